@@ -1,19 +1,29 @@
 import sys
 import os
+import re
 import shutil
 import json
 import uuid
+import gzip
+import lzma
+import hashlib
+import logging
+import time
+import threading
 import subprocess
+from fnmatch import fnmatch
 from collections import Counter
-from PIL import Image
-from PyQt6.QtCore import Qt, QSize, QTimer, QThreadPool, QRunnable, pyqtSignal, QObject
+from concurrent.futures import ThreadPoolExecutor
+_STARTUP_T0 = time.perf_counter()
+from PyQt6.QtCore import Qt, QSize, QRect, QEvent, QTimer, QThreadPool, QRunnable, pyqtSignal, QObject
 # 确保导入了 QIcon
-from PyQt6.QtGui import QPixmap, QImage, QColor, QKeyEvent, QIcon 
+from PyQt6.QtGui import QPixmap, QImage, QColor, QKeyEvent, QIcon, QPainter, QPen 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QGridLayout, QTreeWidget, QTreeWidgetItem, 
                              QPushButton, QLabel, QFileDialog, QMessageBox, 
                              QHeaderView, QLineEdit, QAbstractItemView, QCheckBox, 
-                             QStyledItemDelegate, QFrame, QInputDialog)
+                             QStyledItemDelegate, QFrame, QInputDialog, QProgressDialog,
+                             QComboBox, QDialog, QDialogButtonBox, QMenu)
 
 # 版本号更新为 3.7.11
 VERSION = "3.7.11" 
@@ -22,6 +32,30 @@ CONFIG_FILE = "settings_v3.json"
 LANG_DIR = "languages"
 MAX_PREVIEW_SIZE = 585
 HOVER_DELAY_MS = 500 
+# 导入预览图时的最大边长（按大图预览尺寸的两倍保存，兼顾高分屏）
+PREVIEW_STORE_SIZE = MAX_PREVIEW_SIZE * 2
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif")
+SUMMARY_LIST_LIMIT = 20
+
+# 回收站：删除操作只是把文件改名移入库内的回收站目录，由后台队列按时间/容量清理
+TRASH_DIR = ".trash"
+TRASH_MANIFEST = "manifest.json"
+TRASH_MAX_AGE_S = 7 * 24 * 3600
+TRASH_MAX_BYTES = 20 * 1024 ** 3
+
+COPY_CHUNK = 8 * 1024 * 1024
+
+# 库内可以用压缩格式保存模组（foo.pak.xz / foo.pak.gz），启用时直接流式解压到游戏目录；
+# “压缩闲置模组”统一写成 .xz
+COMPRESSED_OPENERS = {".xz": lambda f: lzma.LZMAFile(f), ".gz": lambda f: gzip.GzipFile(fileobj=f)}
+COMPRESS_EXT = ".xz"
+COMPRESS_PRESET = 3
+
+# 分类目录的最大递归层数，以及扫描时忽略的文件/目录名（fnmatch 通配符）
+SCAN_MAX_DEPTH = 4
+SCAN_IGNORE = [TRASH_DIR]
+
+log = logging.getLogger("modmanager")
 
 COL_CAT = 0      
 COL_CHECK = 1    
@@ -31,6 +65,12 @@ COL_ACTION = 4
 
 COLUMN_PROPORTIONS = [0.18, 0.05, 0.10, 0.47, 0.20]
 
+INVALID_NAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# 分类行在 COL_CAT、模组行在 COL_NAME 上用 ROLE_CAT 记录所属分类（库内相对路径，"/" 分隔）
+ROLE_CAT = Qt.ItemDataRole.UserRole + 1
+ROLE_POPULATED = Qt.ItemDataRole.UserRole + 2
+
 class I18nManager:
     def __init__(self, default_lang="zh_CN"):
         self.current_lang = default_lang
@@ -43,13 +83,39 @@ class I18nManager:
             "btn_open": "📂 Open",
             "btn_set_game": "Select Game",
             "btn_set_repo": "Select Library",
+            "path_targets": "Deploy Target",
+            "btn_add_target": "Add Target",
+            "btn_remove_target": "Remove Target",
+            "dialog_target_name": "Target Name:",
+            "dialog_targets_title": "Choose Deploy Targets",
+            "target_default": "Default",
             "search_placeholder": "🔍 Search Mods... (Ctrl +/- to Zoom)",
             "btn_select_all": "Select All",
             "btn_deselect_all": "Deselect All",
+            "btn_select_by": "Select…",
+            "sel_matching": "All Matching Search",
+            "sel_enabled": "All Enabled",
+            "sel_disabled": "All Disabled",
+            "sel_conflict": "All Conflicting",
             "btn_batch_enable": "Enable Selected",
             "btn_batch_disable": "Disable Selected",
             "btn_batch_move": "Move Selected",
+            "btn_batch_rename": "Rename Selected",
+            "dialog_rename_title": "Batch Rename",
+            "rename_find": "Find:",
+            "rename_replace": "Replace with:",
+            "rename_regex": "Regular expression",
+            "rename_col_old": "Current Name",
+            "rename_col_new": "New Name",
+            "rename_col_status": "Status",
+            "rename_ok": "OK",
+            "rename_unchanged": "Unchanged",
+            "rename_collision": "Name collision",
+            "rename_invalid": "Invalid name",
+            "msg_regex_error": "Invalid pattern: {}",
             "btn_delete": "Delete",
+            "btn_undo_delete": "Undo Delete",
+            "btn_compress_idle": "Compress Idle Mods",
             "btn_new_folder": "New Folder",
             "btn_refresh": "Refresh",
             "btn_lang_toggle": "中文",
@@ -63,11 +129,18 @@ class I18nManager:
             "mod_disabled": "Disabled",
             "tip_select_path": "Please set paths first!",
             "confirm_delete": "Are you sure you want to delete the selected items?",
+            "msg_undo_conflict": "Some items were not restored because the original path is occupied:\n{}",
             "msg_rename_fail": "Rename Failed",
             "msg_op_fail": "Operation Failed",
+            "msg_copying": "Copying mods...",
+            "btn_cancel": "Cancel",
+            "msg_compressing": "Compressing idle mods...",
+            "msg_compress_summary": "Compressed {} mods, saved {}.\n{} mods were kept as-is because they did not shrink.",
             "dialog_move_title": "Move Mods",
             "dialog_move_label": "Destination Folder:",
-            "new_folder_default": "New Folder"
+            "new_folder_default": "New Folder",
+            "msg_preview_import": "Preview Import",
+            "msg_preview_summary": "Assigned {} previews.\n\nUnmatched images ({}):\n{}\n\nMods still without preview ({}):\n{}"
         }
         self.default_zh = {
             "window_title": "尘白禁区模组管理器",
@@ -77,13 +150,39 @@ class I18nManager:
             "btn_open": "📂 打开",
             "btn_set_game": "选择游戏路径",
             "btn_set_repo": "选择库路径",
+            "path_targets": "部署目标",
+            "btn_add_target": "添加目标",
+            "btn_remove_target": "移除目标",
+            "dialog_target_name": "目标名称:",
+            "dialog_targets_title": "选择部署目标",
+            "target_default": "默认",
             "search_placeholder": "🔍 搜索模组... (Ctrl +/- 缩放)",
             "btn_select_all": "全选",
             "btn_deselect_all": "取消全选",
+            "btn_select_by": "按条件选择…",
+            "sel_matching": "匹配搜索的全部",
+            "sel_enabled": "全部已启用",
+            "sel_disabled": "全部已禁用",
+            "sel_conflict": "全部冲突",
             "btn_batch_enable": "启用选中",
             "btn_batch_disable": "禁用选中",
             "btn_batch_move": "移动选中",
+            "btn_batch_rename": "重命名选中",
+            "dialog_rename_title": "批量重命名",
+            "rename_find": "查找:",
+            "rename_replace": "替换为:",
+            "rename_regex": "正则表达式",
+            "rename_col_old": "当前名称",
+            "rename_col_new": "新名称",
+            "rename_col_status": "状态",
+            "rename_ok": "可以",
+            "rename_unchanged": "未改变",
+            "rename_collision": "名称冲突",
+            "rename_invalid": "名称无效",
+            "msg_regex_error": "表达式有误：{}",
             "btn_delete": "删除",
+            "btn_undo_delete": "撤销删除",
+            "btn_compress_idle": "压缩闲置模组",
             "btn_new_folder": "新建文件夹",
             "btn_refresh": "刷新",
             "btn_lang_toggle": "EN",
@@ -97,16 +196,23 @@ class I18nManager:
             "mod_disabled": "已禁用",
             "tip_select_path": "请先设置路径！",
             "confirm_delete": "确定要删除选中的项目吗？",
+            "msg_undo_conflict": "以下项目的原路径已被占用，未能还原：\n{}",
             "msg_rename_fail": "重命名失败",
             "msg_op_fail": "操作失败",
+            "msg_copying": "正在复制模组...",
+            "btn_cancel": "取消",
+            "msg_compressing": "正在压缩闲置模组...",
+            "msg_compress_summary": "已压缩 {} 个模组，节省 {}。\n{} 个模组压缩后没有变小，保持原样。",
             "dialog_move_title": "移动模组",
             "dialog_move_label": "目标文件夹:",
-            "new_folder_default": "新建文件夹"
+            "new_folder_default": "新建文件夹",
+            "msg_preview_import": "导入预览图",
+            "msg_preview_summary": "已设置 {} 张预览图。\n\n未匹配的图片（{}）：\n{}\n\n仍无预览图的模组（{}）：\n{}"
         }
-        self._ensure_lang_environment()
         self.load_language(default_lang)
 
-    def _ensure_lang_environment(self):
+    def ensure_lang_environment(self):
+        # 由主窗口在首帧之后调用
         if not os.path.exists(LANG_DIR):
             os.makedirs(LANG_DIR)
         for code, data in [("zh_CN", self.default_zh), ("en", self.default_en)]:
@@ -210,23 +316,160 @@ QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {{
 }}
 """
 
+def is_cat_item(item):
+    return item.data(COL_CAT, ROLE_CAT) is not None
+
+def scan_library(repo_path, max_depth=SCAN_MAX_DEPTH, ignore=SCAN_IGNORE):
+    # 单次 scandir 遍历，键为相对库根的目录（"/" 分隔，库根为 ""）
+    cats, children, images, packed = {}, {}, {}, {}
+    stack = [("", repo_path, 0)]
+    while stack:
+        rel, path, depth = stack.pop()
+        paks, subdirs, pngs, stored = [], [], set(), {}
+        try:
+            with os.scandir(path) as it:
+                for e in it:
+                    # 回收站不受用户配置的忽略列表影响，始终跳过
+                    if (not rel and e.name == TRASH_DIR) or any(fnmatch(e.name, pat) for pat in ignore): continue
+                    try:
+                        if e.is_file():
+                            low = e.name.lower()
+                            if low.endswith(".pak"): paks.append(e.name)
+                            elif low.endswith(".png"): pngs.add(e.name)
+                            elif low.endswith(tuple(".pak" + ext for ext in COMPRESSED_OPENERS)):
+                                stored[os.path.splitext(e.name)[0]] = e.name
+                        elif e.is_dir() and depth < max_depth:
+                            sub = f"{rel}/{e.name}" if rel else e.name
+                            subdirs.append(sub)
+                            stack.append((sub, e.path, depth + 1))
+                    except OSError: pass
+        except OSError: pass
+        plain = set(paks)
+        stored = {pak: name for pak, name in stored.items() if pak not in plain}
+        paks += list(stored)
+        cats[rel], children[rel], images[rel], packed[rel] = paks, sorted(subdirs, key=str.lower), pngs, stored
+    return cats, children, images, packed
+
+def plan_renames(mods, cats, find, replace, use_regex=False):
+    # 返回 [(分类, 旧名, 新名, 状态)]，状态为 ok / unchanged / invalid / collision
+    pattern = re.compile(find) if use_regex else None
+    stem_of = lambda name: name[:-4] if name.lower().endswith(".pak") else name
+    plan = []
+    for cat, pak in sorted(mods):
+        stem = stem_of(pak)
+        new_stem = pattern.sub(replace, stem) if pattern else (stem.replace(find, replace) if find else stem)
+        # 保留原扩展名的大小写，未匹配的 Foo.PAK 不会被改成 Foo.pak
+        new = new_stem.strip() + pak[len(stem):]
+        plan.append([cat, pak, new, "unchanged" if new == pak else "ok"])
+    existing = {}
+    for cat, paks in cats.items(): existing[cat] = Counter(p.lower() for p in paks)
+    targets = Counter((cat, new.lower()) for cat, pak, new, st in plan)
+    for row in plan:
+        cat, pak, new, st = row
+        if st != "ok": continue
+        if not stem_of(new) or INVALID_NAME_CHARS.search(new): row[3] = "invalid"
+        # 不能与本批次的其他新名字重复，也不能与分类里现有的其他模组（包括本批次中尚未改名的）重名
+        elif targets[(cat, new.lower())] > 1 or existing.get(cat, Counter())[new.lower()] - (new.lower() == pak.lower()) > 0:
+            row[3] = "collision"
+    return [tuple(r) for r in plan]
+
 class RenameDelegate(QStyledItemDelegate): 
     def createEditor(self, parent, option, index): 
         item = self.parent().itemFromIndex(index) 
         if not item: return None 
         col = index.column() 
         i18n = self.parent().window().i18n
-        if not item.parent(): 
-            cat_text = item.text(COL_CAT).replace("📂 ", "").strip() 
-            if col == COL_CAT and cat_text != i18n.t("cat_uncategorized"): 
+        if is_cat_item(item): 
+            if col == COL_CAT and item.data(COL_CAT, ROLE_CAT) != i18n.t("cat_uncategorized"): 
                 editor = QLineEdit(parent) 
                 QTimer.singleShot(0, editor.selectAll) 
                 return editor 
         elif col == COL_NAME: 
             editor = QLineEdit(parent) 
             QTimer.singleShot(0, editor.selectAll) 
-            return editor 
-        return None 
+            return editor
+        return None
+
+class SelectionModel:
+    # 勾选状态的唯一来源，界面只在绘制时读取
+    def __init__(self):
+        self.mods, self.folders, self.per_cat, self.anchor = set(), set(), Counter(), None
+    def __contains__(self, key): return key in self.mods
+    def __iter__(self): return iter(self.mods)
+    def __len__(self): return len(self.mods)
+    def add(self, key):
+        if key not in self.mods:
+            self.mods.add(key)
+            self.per_cat[key[0]] += 1
+    def discard(self, key):
+        if key in self.mods:
+            self.mods.discard(key)
+            self.per_cat[key[0]] -= 1
+    def set_many(self, keys, on):
+        for key in keys: (self.add if on else self.discard)(key)
+    def replace(self, keys, folders=()):
+        self.mods, self.folders = set(keys), set(folders)
+        self.per_cat = Counter(cat for cat, _ in self.mods)
+    def retain(self, mods, cats):
+        self.replace(self.mods & mods, self.folders & set(cats))
+        if self.anchor not in mods: self.anchor = None
+    def clear(self):
+        self.replace(())
+        self.anchor = None
+
+class SelectionDelegate(QStyledItemDelegate):
+    # 勾选列按 SelectionModel 直接绘制，不创建复选框控件
+    def __init__(self, mgr, parent):
+        super().__init__(parent)
+        self.mgr = mgr
+    def createEditor(self, parent, option, index): return None
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        item = self.parent().itemFromIndex(index)
+        if not item: return
+        state, s = self.mgr.check_state(item), int(18 * self.mgr.zoom_level)
+        r = QRect(0, 0, s, s)
+        r.moveCenter(option.rect.center())
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor("#555" if state == Qt.CheckState.Unchecked else "#0078D4"), 2))
+        painter.setBrush(QColor("#0078D4") if state == Qt.CheckState.Checked else Qt.BrushStyle.NoBrush)
+        painter.drawRoundedRect(r.adjusted(1, 1, -1, -1), 4, 4)
+        if state == Qt.CheckState.PartiallyChecked:
+            painter.fillRect(r.adjusted(s // 4, s // 4, -(s // 4), -(s // 4)), QColor("#0078D4"))
+        painter.restore()
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            item = self.parent().itemFromIndex(index)
+            if item: self.mgr.on_check_clicked(item, bool(event.modifiers() & Qt.KeyboardModifier.ShiftModifier))
+            return True
+        # 吞掉按下和双击，避免触发行内改名
+        return event.type() in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonDblClick)
+
+_pil_image = None
+
+def pil_image():
+    # Pillow 导入较慢，推迟到第一个图片任务再导入
+    global _pil_image
+    if _pil_image is None:
+        from PIL import Image
+        _pil_image = Image
+    return _pil_image
+
+class StartupTimer:
+    # 未启用 --startup-timing 时所有调用都是空操作
+    def __init__(self, enabled=False):
+        self.enabled, self.last, self.phases = enabled, _STARTUP_T0, []
+    def mark(self, phase):
+        if not self.enabled: return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+    def report(self):
+        if not self.enabled or not self.phases: return
+        for phase, dt in self.phases: print(f"{phase:<24}{dt * 1000:9.1f} ms")
+        print(f"{'total':<24}{(self.last - _STARTUP_T0) * 1000:9.1f} ms")
+        self.phases = []
 
 def pil_to_qimage(pil_img):
     if pil_img.mode != "RGBA": pil_img = pil_img.convert("RGBA")
@@ -240,6 +483,7 @@ class ImageLoadWorker(QRunnable):
     def run(self):
         try:
             if os.path.exists(self.path):
+                Image = pil_image()
                 with Image.open(self.path) as pil:
                     pil.load()
                     full_qimg = pil_to_qimage(pil)
@@ -252,6 +496,401 @@ class ImageLoadWorker(QRunnable):
 class ImageLoadSignals(QObject):
     image_loaded = pyqtSignal(str, QImage, QImage, str, str)
 
+def normalize_mod_name(name):
+    # 去掉目录和扩展名，忽略大小写、空白和标点
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return re.sub(r"[\W_]+", "", stem.lower())
+
+def convert_preview(src, dst):
+    Image = pil_image()
+    with Image.open(src) as img:
+        img = img.convert("RGB")
+        img.thumbnail((PREVIEW_STORE_SIZE, PREVIEW_STORE_SIZE), Image.Resampling.LANCZOS)
+        img.save(dst + ".part", "PNG")
+    os.replace(dst + ".part", dst)
+
+class PreviewImportSignals(QObject):
+    finished = pyqtSignal(list, list)
+
+class PreviewImportWorker(QRunnable):
+    def __init__(self, jobs, callback_signal):
+        super().__init__()
+        self.jobs, self.callback_signal = jobs, callback_signal
+    def run(self):
+        done, errors = [], []
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4)) as pool:
+            futures = [(pool.submit(convert_preview, src, dst), src, key) for src, dst, key in self.jobs]
+            for fut, src, key in futures:
+                try:
+                    fut.result()
+                    done.append(key)
+                except Exception as e: errors.append(f"{os.path.basename(src)}: {e}")
+        self.callback_signal.emit(done, errors)
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try: total += os.path.getsize(os.path.join(root, f))
+            except OSError: pass
+    return total
+
+class TrashBin:
+    # 每次删除为一个批次目录，manifest 记录原始相对路径
+    _lock = threading.Lock()
+
+    def __init__(self, repo_path):
+        self.root = os.path.join(repo_path, TRASH_DIR)
+        self.repo_path = repo_path
+
+    def move_in(self, rel_paths):
+        batch = f"{int(time.time() * 1000)}_{uuid.uuid4().hex[:6]}"
+        batch_dir = os.path.join(self.root, batch)
+        entries = []
+        with self._lock:
+            os.makedirs(batch_dir)
+            for i, rel in enumerate(rel_paths):
+                src = os.path.join(self.repo_path, rel)
+                if not os.path.exists(src): continue
+                stored = f"{i}_{os.path.basename(rel)}"
+                try:
+                    os.rename(src, os.path.join(batch_dir, stored))
+                    entries.append({"rel": rel, "stored": stored})
+                except OSError: pass
+            with open(os.path.join(batch_dir, TRASH_MANIFEST), 'w', encoding='utf-8') as f:
+                json.dump({"time": time.time(), "entries": entries}, f, ensure_ascii=False)
+        return batch
+
+    def batches(self):
+        if not os.path.isdir(self.root): return []
+        # 正在清理的批次已改名为 *.purging，不再算作可撤销的批次
+        return sorted(n for n in os.listdir(self.root)
+                      if not n.endswith(".purging") and os.path.isfile(os.path.join(self.root, n, TRASH_MANIFEST)))
+
+    def restore(self, batch):
+        # 返回因原路径被占用而未还原的相对路径
+        batch_dir = os.path.join(self.root, batch)
+        manifest_path = os.path.join(batch_dir, TRASH_MANIFEST)
+        with self._lock:
+            if not os.path.isfile(manifest_path): return []
+            with open(manifest_path, 'r', encoding='utf-8') as f: manifest = json.load(f)
+            remaining = []
+            for e in manifest["entries"]:
+                dst = os.path.join(self.repo_path, e["rel"])
+                if os.path.exists(dst):
+                    remaining.append(e)
+                    continue
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.rename(os.path.join(batch_dir, e["stored"]), dst)
+            if remaining:
+                manifest["entries"] = remaining
+                with open(manifest_path, 'w', encoding='utf-8') as f: json.dump(manifest, f, ensure_ascii=False)
+            else:
+                shutil.rmtree(batch_dir, ignore_errors=True)
+        return [e["rel"] for e in remaining]
+
+    def purge(self, max_age=TRASH_MAX_AGE_S, max_bytes=TRASH_MAX_BYTES):
+        # 最新的批次不受容量限制，误删的大目录至少还能撤销一次
+        if not os.path.isdir(self.root): return
+        now, doomed = time.time(), []
+        sizes = [(b, dir_size(os.path.join(self.root, b))) for b in self.batches()]
+        total = sum(sz for _, sz in sizes)
+        for i, (b, sz) in enumerate(sizes):
+            if now - int(b.split("_")[0]) / 1000 > max_age or (total > max_bytes and i < len(sizes) - 1):
+                doomed.append(b)
+                total -= sz
+        for b in doomed:
+            # 先在锁内改名摘除（瞬间完成，batches() 会跳过 *.purging），再在锁外慢慢删除
+            with self._lock:
+                src = os.path.join(self.root, b)
+                if not os.path.isdir(src): continue
+                os.rename(src, src + ".purging")
+        for n in os.listdir(self.root):
+            if n.endswith(".purging"): shutil.rmtree(os.path.join(self.root, n), ignore_errors=True)
+
+class TrashPurgeSignals(QObject):
+    finished = pyqtSignal()
+
+class TrashPurgeWorker(QRunnable):
+    def __init__(self, trash, callback_signal):
+        super().__init__()
+        self.trash, self.callback_signal = trash, callback_signal
+    def run(self):
+        try: self.trash.purge()
+        except: pass
+        self.callback_signal.emit()
+
+class CopyCancelled(Exception):
+    pass
+
+def _copy_file_range_step(fin, fout, offset, count):
+    return os.copy_file_range(fin, fout, count, offset, offset)
+
+def _sendfile_step(fin, fout, offset, count):
+    os.lseek(fout, offset, os.SEEK_SET)
+    return os.sendfile(fout, fin, offset, count)
+
+def _write_all(fd, buf):
+    view = memoryview(buf)
+    while view: view = view[os.write(fd, view):]
+
+def is_compressed(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSED_OPENERS
+
+def copy_file_fast(src, dst, progress=None, cancel=None, verify=False):
+    # 写到 .part 后原子替换，取消或出错时删除临时文件
+    if is_compressed(src): return copy_file_multi(src, [dst], progress, cancel, verify)
+    total = os.path.getsize(src)
+    tmp = dst + ".part"
+    t0, done, method, digest = time.perf_counter(), 0, "chunked", None
+    binary = getattr(os, "O_BINARY", 0)
+    fin = os.open(src, os.O_RDONLY | binary)
+    try:
+        fout = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o644)
+        try:
+            # 校验需要数据经过用户态才能计算摘要，所以只在不校验时尝试内核路径
+            kernel_steps = [] if verify else [(n, f) for n, f in (("copy_file_range", _copy_file_range_step),
+                                                                  ("sendfile", _sendfile_step)) if hasattr(os, n)]
+            for name, step in kernel_steps:
+                try:
+                    while done < total:
+                        if cancel and cancel(): raise CopyCancelled(src)
+                        n = step(fin, fout, done, min(COPY_CHUNK, total - done))
+                        if n == 0: break
+                        done += n
+                        if progress: progress(done, total)
+                    method = name
+                    break
+                except OSError: continue
+            if done < total:
+                method = "chunked"
+                h = hashlib.sha256() if verify else None
+                os.lseek(fin, done, os.SEEK_SET)
+                os.lseek(fout, done, os.SEEK_SET)
+                while True:
+                    if cancel and cancel(): raise CopyCancelled(src)
+                    buf = os.read(fin, COPY_CHUNK)
+                    if not buf: break
+                    if h: h.update(buf)
+                    _write_all(fout, buf)
+                    done += len(buf)
+                    if progress: progress(done, total)
+                if h: digest = h.hexdigest()
+        finally: os.close(fout)
+        if digest and file_sha256(tmp) != digest:
+            raise OSError(f"checksum mismatch: {dst}")
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    finally: os.close(fin)
+    elapsed = time.perf_counter() - t0
+    log.info("copy %s -> %s: %d bytes in %.3fs (%.1f MB/s, %s)", src, dst, done, elapsed,
+             done / elapsed / 1024 ** 2 if elapsed > 0 else 0.0, method)
+    return digest
+
+def copy_file_multi(src, dsts, progress=None, cancel=None, verify=False):
+    # 源文件只读一遍（压缩文件边读边解压），每块并发写入所有目标
+    total = os.path.getsize(src)
+    tmps = [d + ".part" for d in dsts]
+    t0, done = time.perf_counter(), 0
+    h = hashlib.sha256() if verify else None
+    binary = getattr(os, "O_BINARY", 0)
+    fds = []
+    try:
+        opener = COMPRESSED_OPENERS.get(os.path.splitext(src)[1].lower())
+        with open(src, 'rb') as raw, (opener(raw) if opener else raw) as fin, \
+                ThreadPoolExecutor(max_workers=len(dsts)) as pool:
+            for tmp in tmps: fds.append(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o644))
+            buf = fin.read(COPY_CHUNK)
+            while buf:
+                if cancel and cancel(): raise CopyCancelled(src)
+                writes = [pool.submit(_write_all, fd, buf) for fd in fds]
+                if h: h.update(buf)
+                done += len(buf)
+                buf = fin.read(COPY_CHUNK)
+                for w in writes: w.result()
+                if progress: progress(raw.tell(), total)
+        for fd in fds: os.close(fd)
+        fds = []
+        digest = h.hexdigest() if h else None
+        for tmp, dst in zip(tmps, dsts):
+            if digest and file_sha256(tmp) != digest: raise OSError(f"checksum mismatch: {dst}")
+            shutil.copystat(src, tmp)
+        for tmp, dst in zip(tmps, dsts): os.replace(tmp, dst)
+    except BaseException:
+        for fd in fds: os.close(fd)
+        for tmp in tmps:
+            try: os.remove(tmp)
+            except OSError: pass
+        raise
+    elapsed = time.perf_counter() - t0
+    log.info("copy %s -> %d targets: %d bytes in %.3fs (%.1f MB/s, %s)", src, len(dsts), done, elapsed,
+             done / elapsed / 1024 ** 2 if elapsed > 0 else 0.0, "decompress" if opener else "fan-out")
+    return digest
+
+def compress_file(src, progress=None, cancel=None):
+    # 返回节省的字节数；压缩后没有变小时保留原文件并返回 0
+    total = os.path.getsize(src)
+    dst = src + COMPRESS_EXT
+    tmp = dst + ".part"
+    try:
+        with open(src, 'rb') as fin, lzma.open(tmp, 'wb', preset=COMPRESS_PRESET) as fout:
+            for buf in iter(lambda: fin.read(COPY_CHUNK), b""):
+                if cancel and cancel(): raise CopyCancelled(src)
+                fout.write(buf)
+                if progress: progress(fin.tell(), total)
+        saved = total - os.path.getsize(tmp)
+        if saved <= 0:
+            os.remove(tmp)
+            return 0
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+        os.remove(src)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    return saved
+
+def format_size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB": return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for buf in iter(lambda: f.read(COPY_CHUNK), b""): h.update(buf)
+    return h.hexdigest()
+
+class CopySignals(QObject):
+    progress = pyqtSignal(object, object)
+    finished = pyqtSignal(list, bool)
+
+class CopyWorker(QRunnable):
+    def __init__(self, jobs, signals, verify=False):
+        super().__init__()
+        self.jobs, self.signals, self.verify = jobs, signals, verify
+        self.cancel_event = threading.Event()
+    def run(self):
+        sizes = [os.path.getsize(src) if os.path.exists(src) else 0 for src, _ in self.jobs]
+        total, base, errors, cancelled = sum(sizes), 0, [], False
+        for (src, dsts), size in zip(self.jobs, sizes):
+            try:
+                copy = copy_file_fast if len(dsts) == 1 else copy_file_multi
+                copy(src, dsts[0] if len(dsts) == 1 else dsts, cancel=self.cancel_event.is_set, verify=self.verify,
+                     progress=lambda d, t, b=base: self.signals.progress.emit(b + d, total))
+            except CopyCancelled:
+                cancelled = True
+                break
+            except Exception as e: errors.append(f"{os.path.basename(src)}: {e}")
+            base += size
+        self.signals.finished.emit(errors, cancelled)
+
+class CompressSignals(QObject):
+    progress = pyqtSignal(object, object)
+    finished = pyqtSignal(object, int, int, list, bool)
+
+class CompressWorker(QRunnable):
+    # finished: (节省字节数, 压缩个数, 未变小个数, 错误列表, 是否取消)
+    def __init__(self, paths, signals):
+        super().__init__()
+        self.paths, self.signals = paths, signals
+        self.cancel_event = threading.Event()
+    def run(self):
+        sizes = [os.path.getsize(p) if os.path.exists(p) else 0 for p in self.paths]
+        total, base, saved, packed, kept, errors, cancelled = sum(sizes), 0, 0, 0, 0, [], False
+        for path, size in zip(self.paths, sizes):
+            try:
+                s = compress_file(path, cancel=self.cancel_event.is_set,
+                                  progress=lambda d, t, b=base: self.signals.progress.emit(b + d, total))
+                if s: saved, packed = saved + s, packed + 1
+                else: kept += 1
+            except CopyCancelled:
+                cancelled = True
+                break
+            except Exception as e: errors.append(f"{os.path.basename(path)}: {e}")
+            base += size
+        self.signals.finished.emit(saved, packed, kept, errors, cancelled)
+
+class BatchRenameDialog(QDialog):
+    def __init__(self, mods, cats, i18n, parent=None):
+        super().__init__(parent)
+        self.mods, self.cats, self.i18n, self.plan = mods, cats, i18n, []
+        self.setWindowTitle(i18n.t("dialog_rename_title"))
+        self.resize(760, 520)
+        layout = QVBoxLayout(self)
+        form = QGridLayout()
+        self.find_edit, self.replace_edit = QLineEdit(), QLineEdit()
+        self.regex_cb = QCheckBox(i18n.t("rename_regex"))
+        form.addWidget(QLabel(i18n.t("rename_find")), 0, 0)
+        form.addWidget(self.find_edit, 0, 1)
+        form.addWidget(QLabel(i18n.t("rename_replace")), 1, 0)
+        form.addWidget(self.replace_edit, 1, 1)
+        form.addWidget(self.regex_cb, 2, 1)
+        layout.addLayout(form)
+        self.error_lbl = QLabel("")
+        self.error_lbl.setStyleSheet("color: #FF4444;")
+        layout.addWidget(self.error_lbl)
+        self.preview = QTreeWidget()
+        self.preview.setRootIsDecorated(False)
+        self.preview.setHeaderLabels([i18n.t("rename_col_old"), i18n.t("rename_col_new"), i18n.t("rename_col_status")])
+        layout.addWidget(self.preview)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+        self.find_edit.textChanged.connect(self.update_preview)
+        self.replace_edit.textChanged.connect(self.update_preview)
+        self.regex_cb.toggled.connect(self.update_preview)
+        self.update_preview()
+
+    def update_preview(self):
+        try:
+            self.plan = plan_renames(self.mods, self.cats, self.find_edit.text(), self.replace_edit.text(), self.regex_cb.isChecked())
+            self.error_lbl.setText("")
+        except re.error as e:
+            self.plan = []
+            self.error_lbl.setText(self.i18n.t("msg_regex_error", e))
+        self.preview.clear()
+        for cat, old, new, status in self.plan:
+            row = QTreeWidgetItem(self.preview, [old, new, self.i18n.t(f"rename_{status}")])
+            if status in ("invalid", "collision"):
+                for col in range(3): row.setForeground(col, QColor("#FF4444"))
+        statuses = {status for *_, status in self.plan}
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled("ok" in statuses and not statuses & {"invalid", "collision"})
+
+    def renames(self):
+        return [(cat, old, new) for cat, old, new, status in self.plan if status == "ok"]
+
+class TargetPickerDialog(QDialog):
+    def __init__(self, targets, active, i18n, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(i18n.t("dialog_targets_title"))
+        layout = QVBoxLayout(self)
+        self.boxes = []
+        for name, path in targets.items():
+            cb = QCheckBox(f"{name}  ({path})")
+            cb.setChecked(name == active)
+            layout.addWidget(cb)
+            self.boxes.append((cb, path))
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+    def chosen_paths(self):
+        # 两个目标指向同一 Paks 目录时只写一次，否则会对同一个 .part 文件重复写入和替换
+        paths, seen = [], set()
+        for cb, path in self.boxes:
+            key = os.path.normcase(os.path.abspath(path)) if path else None
+            if cb.isChecked() and key and key not in seen:
+                seen.add(key)
+                paths.append(path)
+        return paths
+
 class DropLabel(QLabel):
     def __init__(self, pak_name, rel_dir, parent_mgr):
         super().__init__("...")
@@ -269,15 +908,24 @@ class DropLabel(QLabel):
     def dragEnterEvent(self, event): 
         if event.mimeData().hasUrls(): event.acceptProposedAction()
     def dropEvent(self, event):
-        urls = event.mimeData().urls()
-        if urls: self.mgr.handle_img_drop(self.pak_name, self.rel_dir, urls[0].toLocalFile())
+        paths = [u.toLocalFile() for u in event.mimeData().urls() if u.isLocalFile()]
+        if len(paths) == 1 and os.path.isfile(paths[0]): self.mgr.handle_img_drop(self.pak_name, self.rel_dir, paths[0])
+        elif paths: self.mgr.bulk_assign_previews(paths)
 
 class ModManager3(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_timer=None):
         super().__init__()
-        self.repo_path, self.game_path = "", ""
+        self.startup_timer = startup_timer or StartupTimer()
+        self.first_painted, self.startup_thumbs = False, None
+        # 部署目标：名称 -> Paks 路径，game_path 始终指向当前查看的目标
+        self.targets, self.active_target = {}, ""
+        self.repo_path = ""
+        self.verify_copies = False
+        self.scan_depth, self.scan_ignore = SCAN_MAX_DEPTH, list(SCAN_IGNORE)
+        self.expanded_map = {}
         self.i18n = I18nManager("zh_CN")
         self.load_config()
+        self.startup_timer.mark("i18n + config")
 
         # --- 图标路径自动处理逻辑 ---
         if getattr(sys, 'frozen', False):
@@ -302,19 +950,53 @@ class ModManager3(QMainWindow):
             self.setWindowIcon(QIcon("app.ico"))
         
         self.resize(1200, 850)
-        self.qimage_cache, self.selected_mods, self.known_mods = {}, set(), set()
+        self.setAcceptDrops(True)
+        self.qimage_cache, self.selection, self.known_mods = {}, SelectionModel(), set()
         self.is_first_scan, self.all_mods_in_repo, self.is_all_selected = True, set(), False 
         self.thread_pool = QThreadPool()
         self.image_load_signals = ImageLoadSignals()
         self.image_load_signals.image_loaded.connect(self.on_img_loaded)
+        self.trash_purge_signals = TrashPurgeSignals()
+        self.trash_purge_signals.finished.connect(self.update_undo_btn)
         self.preview_win = QWidget()
         self.preview_win.setWindowFlags(Qt.WindowType.ToolTip | Qt.WindowType.FramelessWindowHint)
         self.preview_win_lbl = QLabel(self.preview_win)
         self.item_map = {}
+        self.copy_signals, self.preview_signals = set(), set()
+        self.mod_rows = {}
+        self.current_cats, self.cat_children, self.cat_images, self.cat_packed = {}, {}, {}, {}
+        self.game_files, self.pak_counts = set(), Counter()
+        self.cat_subtree, self.cat_totals = {}, {}
         
+        # 先只搭界面，扫描和缩略图在首帧绘制之后才开始（见 deferred_startup）
         self.init_ui()
-        self.apply_zoom() 
+        self.apply_zoom(refresh=False)
+        self.update_path_labels()
+        self.startup_timer.mark("build ui")
+
+    @property
+    def selected_mods(self): return self.selection
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            self.startup_timer.mark("first paint")
+            QTimer.singleShot(0, self.deferred_startup)
+
+    def deferred_startup(self):
         self.refresh_data()
+        self.startup_timer.mark("library scan + tree")
+        self.schedule_trash_purge()
+        self.i18n.ensure_lang_environment()
+        self.startup_timer.mark("language files")
+        self.startup_thumbs = set(self.item_map)
+        if not self.startup_thumbs: self.finish_startup_timing()
+
+    def finish_startup_timing(self):
+        self.startup_thumbs = None
+        self.startup_timer.mark("thumbnails")
+        self.startup_timer.report()
 
     def init_ui(self):
         central = QWidget()
@@ -354,6 +1036,21 @@ class ModManager3(QMainWindow):
         path_bar_layout.addWidget(self.repo_open_btn, 1, 2)
         path_bar_layout.addWidget(self.repo_btn, 1, 3)
         
+        self.target_title_lbl = QLabel(self.i18n.t('path_targets') + ":")
+        self.target_title_lbl.setObjectName("PathLabel")
+        self.target_combo = QComboBox()
+        self.target_combo.currentTextChanged.connect(self.switch_target)
+        self.add_target_btn = QPushButton(self.i18n.t("btn_add_target"))
+        self.add_target_btn.clicked.connect(self.add_target)
+        self.remove_target_btn = QPushButton(self.i18n.t("btn_remove_target"))
+        self.remove_target_btn.clicked.connect(self.remove_target)
+        self.update_target_combo()
+
+        path_bar_layout.addWidget(self.target_title_lbl, 2, 0)
+        path_bar_layout.addWidget(self.target_combo, 2, 1)
+        path_bar_layout.addWidget(self.add_target_btn, 2, 2)
+        path_bar_layout.addWidget(self.remove_target_btn, 2, 3)
+        
         path_bar_layout.setColumnStretch(1, 1)
         layout.addWidget(path_bar)
 
@@ -366,6 +1063,15 @@ class ModManager3(QMainWindow):
         self.all_sel_btn = QPushButton(self.i18n.t("btn_select_all"))
         self.all_sel_btn.clicked.connect(self.toggle_all_selection)
         batch_layout.addWidget(self.all_sel_btn)
+
+        self.btn_select_by = QPushButton(self.i18n.t("btn_select_by"))
+        sel_menu = QMenu(self.btn_select_by)
+        self.sel_actions = {}
+        for kind in ("matching", "enabled", "disabled", "conflict"):
+            self.sel_actions[kind] = sel_menu.addAction(self.i18n.t(f"sel_{kind}"))
+            self.sel_actions[kind].triggered.connect(lambda chk, k=kind: self.select_by(k))
+        self.btn_select_by.setMenu(sel_menu)
+        batch_layout.addWidget(self.btn_select_by)
         
         self.btn_batch_en = QPushButton(self.i18n.t("btn_batch_enable"))
         self.btn_batch_en.clicked.connect(lambda: self.exec_batch(True))
@@ -378,11 +1084,23 @@ class ModManager3(QMainWindow):
         self.btn_batch_move = QPushButton(self.i18n.t("btn_batch_move"))
         self.btn_batch_move.clicked.connect(self.batch_move_mods)
         batch_layout.addWidget(self.btn_batch_move)
+
+        self.btn_batch_rename = QPushButton(self.i18n.t("btn_batch_rename"))
+        self.btn_batch_rename.clicked.connect(self.batch_rename_mods)
+        batch_layout.addWidget(self.btn_batch_rename)
         
         self.btn_batch_del = QPushButton(self.i18n.t("btn_delete"))
         self.btn_batch_del.setObjectName("btn_delete")
         self.btn_batch_del.clicked.connect(self.batch_delete_logic)
         batch_layout.addWidget(self.btn_batch_del)
+
+        self.btn_undo_del = QPushButton(self.i18n.t("btn_undo_delete"))
+        self.btn_undo_del.clicked.connect(self.undo_delete)
+        batch_layout.addWidget(self.btn_undo_del)
+
+        self.btn_compress = QPushButton(self.i18n.t("btn_compress_idle"))
+        self.btn_compress.clicked.connect(self.compress_idle_mods)
+        batch_layout.addWidget(self.btn_compress)
         batch_layout.addStretch()
         
         self.conflict_label = QLabel("")
@@ -408,11 +1126,12 @@ class ModManager3(QMainWindow):
         self.tree.setColumnCount(5)
         self.update_tree_headers()
         self.tree.setRootIsDecorated(False)
-        self.tree.setIndentation(0)
         self.tree.header().setStretchLastSection(True)
         self.tree.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
         self.tree.setItemDelegate(RenameDelegate(self.tree))
+        self.tree.setItemDelegateForColumn(COL_CHECK, SelectionDelegate(self, self.tree))
         self.tree.itemClicked.connect(self.on_item_clicked)
+        self.tree.itemExpanded.connect(self.populate_cat_item)
         self.tree.itemChanged.connect(self.on_item_data_changed)
         self.tree.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
         self.tree.header().setSectionsMovable(False)
@@ -434,22 +1153,29 @@ class ModManager3(QMainWindow):
         self.setWindowTitle(f"{self.i18n.t('window_title')} {VERSION}")
         self.game_title_lbl.setText(self.i18n.t('path_game_paks') + ":")
         self.repo_title_lbl.setText(self.i18n.t('path_mod_repo') + ":")
+        self.target_title_lbl.setText(self.i18n.t('path_targets') + ":")
+        self.add_target_btn.setText(self.i18n.t("btn_add_target"))
+        self.remove_target_btn.setText(self.i18n.t("btn_remove_target"))
         self.game_open_btn.setText(self.i18n.t("btn_open"))
         self.repo_open_btn.setText(self.i18n.t("btn_open"))
         self.game_btn.setText(self.i18n.t("btn_set_game"))
         self.repo_btn.setText(self.i18n.t("btn_set_repo"))
         self.search_bar.setPlaceholderText(self.i18n.t("search_placeholder"))
         self.all_sel_btn.setText(self.i18n.t("btn_select_all" if not self.is_all_selected else "btn_deselect_all"))
+        self.btn_select_by.setText(self.i18n.t("btn_select_by"))
+        for kind, act in self.sel_actions.items(): act.setText(self.i18n.t(f"sel_{kind}"))
         self.btn_batch_en.setText(self.i18n.t("btn_batch_enable"))
         self.btn_batch_dis.setText(self.i18n.t("btn_batch_disable"))
         self.btn_batch_move.setText(self.i18n.t("btn_batch_move"))
+        self.btn_batch_rename.setText(self.i18n.t("btn_batch_rename"))
         self.btn_batch_del.setText(self.i18n.t("btn_delete"))
+        self.btn_undo_del.setText(self.i18n.t("btn_undo_delete"))
+        self.btn_compress.setText(self.i18n.t("btn_compress_idle"))
         self.btn_new.setText(self.i18n.t("btn_new_folder"))
         self.btn_ref.setText(self.i18n.t("btn_refresh"))
         self.lang_btn.setText(self.i18n.t("btn_lang_toggle"))
         
         self.apply_zoom()
-        self.refresh_data()
 
     def open_folder_explorer(self, path):
         if not path or not os.path.exists(path): return
@@ -476,7 +1202,7 @@ class ModManager3(QMainWindow):
             self.zoom_level = new_zoom
             self.apply_zoom()
 
-    def apply_zoom(self):
+    def apply_zoom(self, refresh=True):
         f = int(self.base_font_size * self.zoom_level)
         padding = int(2 * self.zoom_level)
         item_h = int(68 * self.zoom_level)
@@ -494,17 +1220,20 @@ class ModManager3(QMainWindow):
              scroll_width=scroll_w, scroll_radius=scroll_r
         )
         self.setStyleSheet(new_qss)
+        self.tree.setIndentation(int(16 * self.zoom_level))
         
         base_title_w = 150 if self.i18n.current_lang == "en" else 115
         self.game_title_lbl.setFixedWidth(int(base_title_w * self.zoom_level))
         self.repo_title_lbl.setFixedWidth(int(base_title_w * self.zoom_level))
+        self.target_title_lbl.setFixedWidth(int(base_title_w * self.zoom_level))
         
         min_btn_w = int(100 * self.zoom_level)
-        for btn in [self.game_open_btn, self.repo_open_btn, self.game_btn, self.repo_btn]:
+        for btn in [self.game_open_btn, self.repo_open_btn, self.game_btn, self.repo_btn,
+                    self.add_target_btn, self.remove_target_btn]:
             btn.setMinimumWidth(min_btn_w)
             btn.setMaximumWidth(250) 
             
-        self.refresh_data() 
+        if refresh: self.refresh_data() 
 
     def wrap_center(self, widget, height=None):
         if height is None: height = int(66 * self.zoom_level)
@@ -517,135 +1246,242 @@ class ModManager3(QMainWindow):
         l.addWidget(widget)
         return c
 
-    def refresh_data(self):
-        scroll_pos = self.tree.verticalScrollBar().value()
+    def update_path_labels(self):
         not_set_html = f'<span style="color: #FF4444;">{self.i18n.t("not_set")}</span>'
         self.game_path_lbl.setText(f"{self.game_path if self.game_path else not_set_html}")
         self.repo_path_lbl.setText(f"{self.repo_path if self.repo_path else not_set_html}")
+
+    def refresh_data(self):
+        scroll_pos = self.tree.verticalScrollBar().value()
+        self.update_path_labels()
         self.update_tree_headers()
 
         if not self.repo_path or not self.game_path: return
         
-        expanded_map = {self.tree.topLevelItem(i).text(COL_CAT).replace("📂 ", "").strip(): self.tree.topLevelItem(i).isExpanded() 
-                        for i in range(self.tree.topLevelItemCount())}
+        self.snapshot_expanded()
             
         self.tree.blockSignals(True)
         self.tree.clear()
         self.item_map.clear()
+        self.mod_rows.clear()
         self.all_mods_in_repo.clear()
-        game_files = os.listdir(self.game_path) if os.path.exists(self.game_path) else []
+        self.game_files = set(os.listdir(self.game_path)) if os.path.exists(self.game_path) else set()
         uncat_key = self.i18n.t("cat_uncategorized")
-        self.current_cats = {uncat_key: []}
-        
-        if os.path.exists(self.repo_path):
-            for e in os.scandir(self.repo_path):
-                if e.is_file() and e.name.lower().endswith(".pak"): 
-                    self.current_cats[uncat_key].append(e.name)
-                    self.all_mods_in_repo.add((uncat_key, e.name))
-                elif e.is_dir(): 
-                    paks = [f for f in os.listdir(e.path) if f.lower().endswith(".pak")]
-                    self.current_cats[e.name] = paks
-                    for p in paks: self.all_mods_in_repo.add((e.name, p))
+        cats, children, images, packed = scan_library(self.repo_path, self.scan_depth, self.scan_ignore) \
+            if os.path.exists(self.repo_path) else ({"": []}, {"": []}, {"": set()}, {"": {}})
+        key = lambda rel: rel if rel else uncat_key
+        self.current_cats = {key(rel): paks for rel, paks in cats.items()}
+        self.cat_children = {key(rel): subs for rel, subs in children.items()}
+        self.cat_images = {key(rel): pngs for rel, pngs in images.items()}
+        self.cat_packed = {key(rel): stored for rel, stored in packed.items()}
+        for cat, paks in self.current_cats.items():
+            for p in paks: self.all_mods_in_repo.add((cat, p))
+        self.index_library()
+        self.selection.retain(self.all_mods_in_repo, self.current_cats)
         
         if self.is_first_scan:
             for cat, paks in self.current_cats.items():
                 for pak in paks: self.known_mods.add(pak)
             self.is_first_scan = False
 
-        counts = self.get_pak_counts()
-        conflict_groups = sum(1 for pak_name in counts if counts[pak_name] > 1)
-        self.conflict_label.setText(self.i18n.t("conflict_warn", conflict_groups) if conflict_groups > 0 else "")
+        self.update_conflict_label()
         
-        row_h, thumb_s = int(68 * self.zoom_level), int(60 * self.zoom_level)
-        for cat, paks in self.current_cats.items():
-            parent = QTreeWidgetItem(self.tree)
-            cat_display = f"📂 {cat}"
-            parent.setText(COL_CAT, cat_display)
-            parent.setData(COL_CAT, Qt.ItemDataRole.UserRole, cat_display)
-            parent.setFlags(parent.flags() | Qt.ItemFlag.ItemIsEditable)
-            parent.setSizeHint(0, QSize(0, int(34 * self.zoom_level)))
-            cb = QCheckBox()
-            cb.stateChanged.connect(lambda st, it=parent: self.on_folder_cb(it, st))
-            self.tree.setItemWidget(parent, COL_CHECK, self.wrap_center(cb, height=int(34 * self.zoom_level)))
-            parent.setExpanded(expanded_map.get(cat, True))
-            
-            for pak in sorted(paks):
-                is_en = pak in game_files
-                item = QTreeWidgetItem(parent)
-                item.setText(COL_NAME, pak)
-                item.setData(COL_NAME, Qt.ItemDataRole.UserRole, pak)
-                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)
-                if pak not in self.known_mods: item.setForeground(COL_NAME, QColor("#00A3FF"))
-                elif counts[pak] > 1: item.setForeground(COL_NAME, QColor("#FF4444"))
-                else: item.setForeground(COL_NAME, QColor("#FFFFFF"))
-
-                m_cb = QCheckBox()
-                m_cb.setChecked((cat, pak) in self.selected_mods)
-                m_cb.stateChanged.connect(lambda st, c=cat, p=pak: self.on_mod_cb(c, p, st))
-                self.tree.setItemWidget(item, COL_CHECK, self.wrap_center(m_cb, row_h))
-                
-                rel = "" if cat == uncat_key else cat
-                lbl = DropLabel(pak, rel, self)
-                lbl.setFixedSize(thumb_s, thumb_s)
-                self.tree.setItemWidget(item, COL_PREVIEW, self.wrap_center(lbl, row_h))
-                
-                btn_txt = self.i18n.t("mod_enabled") if is_en else self.i18n.t("mod_disabled")
-                btn = QPushButton(btn_txt)
-                btn.setMinimumWidth(int(100 * self.zoom_level))
-                btn.setStyleSheet("background-color: #0078D4;" if is_en else "background-color: #3A3A3A; color: #AAA;")
-                btn.clicked.connect(lambda chk, s=os.path.join(self.repo_path, rel, pak), p=pak, en=is_en, b=btn: self.toggle_mod(s, p, en, b))
-                self.tree.setItemWidget(item, COL_ACTION, self.wrap_center(btn, row_h))
-                
-                tid = str(uuid.uuid4())
-                self.item_map[tid] = lbl
-                img_path = os.path.join(self.repo_path, rel, pak.replace(".pak", ".png"))
-                self.thread_pool.start(ImageLoadWorker(img_path, pak.replace(".pak", ""), tid, self.image_load_signals.image_loaded))
+        # 只创建顶层分类，子分类和模组行在展开时才填充
+        for cat in [uncat_key] + self.cat_children[uncat_key]:
+            self.add_cat_item(self.tree, cat)
                 
         self.tree.blockSignals(False)
+        if self.search_bar.text(): self.filter_list()
         self.sync_all_sel_state()
+        self.update_undo_btn()
         QTimer.singleShot(0, self.adjust_cols)
         QTimer.singleShot(10, lambda: self.tree.verticalScrollBar().setValue(scroll_pos))
 
+    def snapshot_expanded(self):
+        # 还没创建出来的子分类保留原来记录的状态
+        self.expanded_map.update({it.data(COL_CAT, ROLE_CAT): it.isExpanded() for it in self.iter_tree_items() if is_cat_item(it)})
+        return self.expanded_map
+
+    def iter_tree_items(self, parent=None):
+        items = [self.tree.topLevelItem(i) for i in range(self.tree.topLevelItemCount())] if parent is None \
+            else [parent.child(i) for i in range(parent.childCount())]
+        for it in items:
+            yield it
+            yield from self.iter_tree_items(it)
+
+    def iter_cat_mods(self, cat):
+        # 按数据而不是界面列出，包含子分类
+        for pak in self.current_cats.get(cat, []): yield cat, pak
+        for sub in self.cat_children.get(cat, []) if cat != self.i18n.t("cat_uncategorized") else []:
+            yield from self.iter_cat_mods(sub)
+
+    def index_library(self):
+        # 记录每个分类的子树和模组总数，绘制文件夹勾选状态时不必遍历
+        uncat_key = self.i18n.t("cat_uncategorized")
+        self.cat_subtree, self.cat_totals = {}, {}
+        def visit(cat):
+            subtree = [cat]
+            for sub in self.cat_children.get(cat, []) if cat != uncat_key else []: subtree += visit(sub)
+            self.cat_subtree[cat] = subtree
+            self.cat_totals[cat] = sum(len(self.current_cats.get(c, [])) for c in subtree)
+            return subtree
+        for cat in [uncat_key] + self.cat_children.get(uncat_key, []): visit(cat)
+
+    def add_cat_item(self, parent_item, cat):
+        uncat_key = self.i18n.t("cat_uncategorized")
+        item = QTreeWidgetItem(parent_item)
+        cat_display = f"📂 {cat if cat == uncat_key else cat.rsplit('/', 1)[-1]}"
+        item.setText(COL_CAT, cat_display)
+        item.setData(COL_CAT, Qt.ItemDataRole.UserRole, cat_display)
+        item.setData(COL_CAT, ROLE_CAT, cat)
+        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)
+        item.setSizeHint(0, QSize(0, int(34 * self.zoom_level)))
+        has_content = self.current_cats.get(cat) or (cat != uncat_key and self.cat_children.get(cat))
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator if has_content
+                                     else QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicator)
+        # 默认折叠，只有用户展开过（包括上次保存的视图）的分类才立即填充
+        if self.expanded_map.get(cat, False):
+            self.populate_cat_item(item)
+            item.setExpanded(True)
+        return item
+
+    def populate_cat_item(self, parent):
+        if not is_cat_item(parent) or parent.data(COL_CAT, ROLE_POPULATED): return
+        parent.setData(COL_CAT, ROLE_POPULATED, True)
+        cat = parent.data(COL_CAT, ROLE_CAT)
+        blocked = self.tree.blockSignals(True)
+        if cat != self.i18n.t("cat_uncategorized"):
+            for sub in self.cat_children.get(cat, []): self.add_cat_item(parent, sub)
+        self.add_mod_items(parent, cat, sorted(self.current_cats.get(cat, [])))
+        self.tree.blockSignals(blocked)
+        if not blocked and self.search_bar.text(): self.filter_list()
+
+    def add_mod_items(self, parent, cat, paks):
+        # 一次性挂载：逐行挂载时自适应宽度的状态列每次都要重新测量全部行
+        items = []
+        for pak in paks:
+            item = QTreeWidgetItem()
+            item.setText(COL_NAME, pak)
+            item.setData(COL_NAME, Qt.ItemDataRole.UserRole, pak)
+            item.setData(COL_NAME, ROLE_CAT, cat)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEditable)
+            self.apply_name_color(item, pak)
+            items.append(item)
+        parent.addChildren(items)
+        for item, pak in zip(items, paks): self.add_mod_widgets(item, cat, pak)
+
+    def add_mod_widgets(self, item, cat, pak):
+        uncat_key = self.i18n.t("cat_uncategorized")
+        row_h, thumb_s = int(68 * self.zoom_level), int(60 * self.zoom_level)
+        is_en = pak in self.game_files
+        rel = "" if cat == uncat_key else cat
+        lbl = DropLabel(pak, rel, self)
+        lbl.setFixedSize(thumb_s, thumb_s)
+        self.tree.setItemWidget(item, COL_PREVIEW, self.wrap_center(lbl, row_h))
+        
+        btn = QPushButton()
+        btn.setMinimumWidth(int(100 * self.zoom_level))
+        self.set_action_btn_state(btn, is_en)
+        btn.clicked.connect(lambda chk, s=self.mod_path(cat, pak), p=pak, b=btn: self.toggle_mod(s, p, b))
+        self.tree.setItemWidget(item, COL_ACTION, self.wrap_center(btn, row_h))
+        
+        self.mod_rows[(cat, pak)] = (item, lbl, btn)
+        # 扫描时已记录每个目录里的 png，没有预览图的模组不必再提交加载任务
+        if pak.replace(".pak", ".png") in self.cat_images.get(cat, ()): self.load_preview(lbl, rel, pak)
+
+    def stored_name(self, cat, pak):
+        # 压缩保存时带 .xz/.gz 后缀
+        return self.cat_packed.get(cat, {}).get(pak, pak)
+
+    def mod_path(self, cat, pak):
+        rel = "" if cat == self.i18n.t("cat_uncategorized") else cat
+        return os.path.join(self.repo_path, rel, self.stored_name(cat, pak))
+
+    def apply_name_color(self, item, pak):
+        if pak not in self.known_mods: item.setForeground(COL_NAME, QColor("#00A3FF"))
+        elif self.pak_counts[pak] > 1: item.setForeground(COL_NAME, QColor("#FF4444"))
+        else: item.setForeground(COL_NAME, QColor("#FFFFFF"))
+
+    def load_preview(self, lbl, rel, pak):
+        tid = str(uuid.uuid4())
+        self.item_map[tid] = lbl
+        img_path = os.path.join(self.repo_path, rel, pak.replace(".pak", ".png"))
+        self.thread_pool.start(ImageLoadWorker(img_path, pak.replace(".pak", ""), tid, self.image_load_signals.image_loaded))
+
     def toggle_all_selection(self):
         if not self.repo_path: return
         self.is_all_selected = not self.is_all_selected
-        self.selected_mods.clear()
+        uncat_key = self.i18n.t("cat_uncategorized")
         if self.is_all_selected:
-            for cat, paks in self.current_cats.items():
-                for pak in paks: self.selected_mods.add((cat, pak))
-        self.tree.blockSignals(True)
-        for i in range(self.tree.topLevelItemCount()):
-            parent = self.tree.topLevelItem(i)
-            p_cb_w = self.tree.itemWidget(parent, COL_CHECK)
-            if p_cb_w: p_cb_w.findChild(QCheckBox).setChecked(self.is_all_selected)
-            for j in range(parent.childCount()):
-                child = parent.child(j)
-                c_cb_w = self.tree.itemWidget(child, COL_CHECK)
-                if c_cb_w: c_cb_w.findChild(QCheckBox).setChecked(self.is_all_selected)
-        self.tree.blockSignals(False)
-        self.update_all_sel_btn_style()
+            self.selection.replace(self.all_mods_in_repo, (c for c in self.current_cats if c != uncat_key))
+        else: self.selection.clear()
+        self.on_selection_changed()
 
     def update_all_sel_btn_style(self):
         self.all_sel_btn.setText(self.i18n.t("btn_deselect_all" if self.is_all_selected else "btn_select_all"))
         self.all_sel_btn.setStyleSheet("background-color: #0078D4; color: white;" if self.is_all_selected else "")
 
-    def on_folder_cb(self, it, st):
-        self.tree.blockSignals(True)
-        is_checked = (st == Qt.CheckState.Checked.value)
-        cat_name = it.text(COL_CAT).replace("📂 ", "").strip()
-        for i in range(it.childCount()):
-            child = it.child(i)
-            w = self.tree.itemWidget(child, COL_CHECK)
-            pak_name = child.text(COL_NAME)
-            if w: w.findChild(QCheckBox).setChecked(is_checked)
-            if is_checked: self.selected_mods.add((cat_name, pak_name))
-            else: self.selected_mods.discard((cat_name, pak_name))
-        self.tree.blockSignals(False)
-        self.sync_all_sel_state()
+    def check_state(self, item):
+        if not is_cat_item(item):
+            key = (item.data(COL_NAME, ROLE_CAT), item.data(COL_NAME, Qt.ItemDataRole.UserRole))
+            return Qt.CheckState.Checked if key in self.selection else Qt.CheckState.Unchecked
+        cat = item.data(COL_CAT, ROLE_CAT)
+        if cat in self.selection.folders: return Qt.CheckState.Checked
+        sel, total = sum(self.selection.per_cat[c] for c in self.cat_subtree.get(cat, [cat])), self.cat_totals.get(cat, 0)
+        if total and sel >= total: return Qt.CheckState.Checked
+        return Qt.CheckState.PartiallyChecked if sel else Qt.CheckState.Unchecked
+
+    def cat_ancestors(self, cat):
+        parts = cat.split("/") if cat != self.i18n.t("cat_uncategorized") else []
+        return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+    def on_check_clicked(self, item, shift=False):
+        if is_cat_item(item):
+            cat = item.data(COL_CAT, ROLE_CAT)
+            on = self.check_state(item) != Qt.CheckState.Checked
+            self.selection.set_many(self.iter_cat_mods(cat), on)
+            if on and cat != self.i18n.t("cat_uncategorized"): self.selection.folders.add(cat)
+            elif not on: self.selection.folders.difference_update(self.cat_subtree.get(cat, [cat]) + self.cat_ancestors(cat))
+        else:
+            key = (item.data(COL_NAME, ROLE_CAT), item.data(COL_NAME, Qt.ItemDataRole.UserRole))
+            if shift and self.selection.anchor: self.select_range(self.selection.anchor, key)
+            elif key in self.selection:
+                self.selection.discard(key)
+                # 取消了其中的模组，文件夹就不再算整体勾选，避免删除时连同整个目录一起删掉
+                self.selection.folders.difference_update(self.cat_ancestors(key[0]))
+            else: self.selection.add(key)
+            self.selection.anchor = key
+        self.on_selection_changed()
+
+    def iter_visible_mods(self, parent=None):
+        # 只走展开且未被搜索隐藏的行，折叠分类里的模组用户看不到，不参与范围选择
+        items = [self.tree.topLevelItem(i) for i in range(self.tree.topLevelItemCount())] if parent is None \
+            else [parent.child(i) for i in range(parent.childCount())]
+        for it in items:
+            if it.isHidden(): continue
+            if not is_cat_item(it): yield it.data(COL_NAME, ROLE_CAT), it.data(COL_NAME, Qt.ItemDataRole.UserRole)
+            elif it.isExpanded(): yield from self.iter_visible_mods(it)
+
+    def select_range(self, a, b):
+        rows = list(self.iter_visible_mods())
+        if a not in rows or b not in rows:
+            self.selection.add(b)
+            return
+        i, j = sorted((rows.index(a), rows.index(b)))
+        self.selection.set_many(rows[i:j + 1], True)
 
-    def on_mod_cb(self, c, p, st):
-        if st == Qt.CheckState.Checked.value: self.selected_mods.add((c, p))
-        else: self.selected_mods.discard((c, p))
+    def select_by(self, kind):
+        t = self.search_bar.text().lower()
+        tests = {"matching": lambda pak: t in pak.lower(),
+                 "enabled": lambda pak: pak in self.game_files,
+                 "disabled": lambda pak: pak not in self.game_files,
+                 "conflict": lambda pak: self.pak_counts[pak] > 1}
+        self.selection.replace(k for k in self.all_mods_in_repo if tests[kind](k[1]))
+        self.on_selection_changed()
+
+    def on_selection_changed(self):
+        # 勾选状态只存在于 SelectionModel，刷新视口即可，只有可见行会被重绘
+        self.tree.viewport().update()
         self.sync_all_sel_state()
 
     def sync_all_sel_state(self):
@@ -654,7 +1490,8 @@ class ModManager3(QMainWindow):
         self.update_all_sel_btn_style()
 
     def on_item_clicked(self, item, col): 
-        if not item.parent(): 
+        if is_cat_item(item) and col != COL_CHECK: 
+            self.populate_cat_item(item)
             item.setExpanded(not item.isExpanded())
             QTimer.singleShot(10, self.adjust_cols)
 
@@ -665,27 +1502,108 @@ class ModManager3(QMainWindow):
         if not old_val or old_val == new_val: return
         uncat_key = self.i18n.t("cat_uncategorized")
         try:
-            if not item.parent() and column == COL_CAT:
-                old_clean, new_clean = old_val.replace("📂 ", "").strip(), new_val.replace("📂 ", "").strip()
-                if old_clean == uncat_key: return
-                os.rename(os.path.join(self.repo_path, old_clean), os.path.join(self.repo_path, new_clean))
-            elif item.parent() and column == COL_NAME:
-                if not new_val.lower().endswith(".pak"): new_val += ".pak"
-                cat = item.parent().text(COL_CAT).replace("📂 ", "").strip()
-                rel = "" if cat == uncat_key else cat
-                if self.game_path:
-                    old_game_pak = os.path.join(self.game_path, old_val)
-                    if os.path.exists(old_game_pak): os.remove(old_game_pak)
-                os.rename(os.path.join(self.repo_path, rel, old_val), os.path.join(self.repo_path, rel, new_val))
-                img_old = os.path.join(self.repo_path, rel, old_val.replace(".pak", ".png"))
-                if os.path.exists(img_old): os.rename(img_old, os.path.join(self.repo_path, rel, new_val.replace(".pak", ".png")))
-                self.known_mods.discard(old_val)
-                self.known_mods.add(new_val)
+            if is_cat_item(item) and column == COL_CAT:
+                old_rel, new_clean = item.data(COL_CAT, ROLE_CAT), new_val.replace("📂 ", "").strip()
+                if old_rel == uncat_key: return
+                parent_rel = old_rel.rsplit("/", 1)[0] if "/" in old_rel else ""
+                os.rename(os.path.join(self.repo_path, old_rel), os.path.join(self.repo_path, parent_rel, new_clean))
+            elif not is_cat_item(item) and column == COL_NAME:
+                if new_val.lower().endswith(".pak"): new_val = new_val[:-4]
+                cat = item.data(COL_NAME, ROLE_CAT)
+                _, _, new_pak, status = plan_renames([(cat, old_val)], self.current_cats, old_val[:-4], new_val)[0]
+                if status in ("invalid", "collision"):
+                    QMessageBox.warning(self, self.i18n.t("msg_rename_fail"), self.i18n.t(f"rename_{status}"))
+                renames = [(cat, old_val, new_pak)] if status == "ok" else []
+                # 重建会删除正在编辑的行，放到信号处理结束之后再做；改名无效时同样重建以恢复原名
+                QTimer.singleShot(0, lambda: self.apply_renames(renames, [cat]))
+                return
             self.refresh_data()
         except Exception as e: 
             QMessageBox.warning(self, self.i18n.t("msg_rename_fail"), str(e))
             self.refresh_data()
 
+    def batch_rename_mods(self):
+        if not self.selected_mods: return
+        dlg = BatchRenameDialog(sorted(self.selected_mods), self.current_cats, self.i18n, self)
+        if dlg.exec() == QDialog.DialogCode.Accepted: self.apply_renames(dlg.renames())
+
+    def rename_mod_files(self, cat, old, new):
+        # 先检查所有目标路径，任何一步失败都回滚已完成的改名
+        mod_dir = os.path.join(self.repo_path, "" if cat == self.i18n.t("cat_uncategorized") else cat)
+        suffix = self.stored_name(cat, old)[len(old):]
+        steps = [(os.path.join(mod_dir, old + suffix), os.path.join(mod_dir, new + suffix))]
+        img = os.path.join(mod_dir, os.path.splitext(old)[0] + ".png")
+        if os.path.exists(img): steps.append((img, os.path.join(mod_dir, os.path.splitext(new)[0] + ".png")))
+        for target_path in self.targets.values():
+            if target_path and os.path.exists(os.path.join(target_path, old)):
+                steps.append((os.path.join(target_path, old), os.path.join(target_path, new)))
+        for src, dst in steps:
+            # 仅大小写不同的改名在不区分大小写的文件系统上指向同一个文件
+            if os.path.exists(dst) and not os.path.samefile(src, dst): raise FileExistsError(dst)
+        done = []
+        try:
+            for src, dst in steps:
+                os.rename(src, dst)
+                done.append((src, dst))
+        except OSError:
+            for src, dst in reversed(done):
+                try: os.rename(dst, src)
+                except OSError: pass
+            raise
+
+    def apply_renames(self, renames, extra_cats=()):
+        # 就地更新数据，只重建受影响分类下的模组行
+        done, errors = [], []
+        for cat, old, new in renames:
+            try:
+                self.rename_mod_files(cat, old, new)
+                done.append((cat, old, new))
+            except Exception as e: errors.append(f"{old}: {e}")
+        for cat, old, new in done:
+            paks = self.current_cats[cat]
+            paks[paks.index(old)] = new
+            packed = self.cat_packed.get(cat, {})
+            if old in packed: packed[new] = new + packed.pop(old)[len(old):]
+            pngs = self.cat_images.get(cat, set())
+            old_png, new_png = os.path.splitext(old)[0] + ".png", os.path.splitext(new)[0] + ".png"
+            if old_png in pngs:
+                pngs.discard(old_png)
+                pngs.add(new_png)
+            self.all_mods_in_repo.discard((cat, old))
+            self.all_mods_in_repo.add((cat, new))
+            if (cat, old) in self.selected_mods:
+                self.selected_mods.discard((cat, old))
+                self.selected_mods.add((cat, new))
+            if old in self.game_files:
+                self.game_files.discard(old)
+                self.game_files.add(new)
+            self.known_mods.discard(old)
+            self.known_mods.add(new)
+            if old[:-4] in self.qimage_cache: self.qimage_cache[new[:-4]] = self.qimage_cache.pop(old[:-4])
+        self.update_conflict_label()
+        self.index_library()
+        affected = {cat for cat, _, _ in done} | set(extra_cats)
+        for item in list(self.iter_tree_items()):
+            if is_cat_item(item) and item.data(COL_CAT, ROLE_CAT) in affected and item.data(COL_CAT, ROLE_POPULATED):
+                self.rebuild_mod_rows(item)
+        for (cat, pak), (item, lbl, btn) in self.mod_rows.items(): self.apply_name_color(item, pak)
+        if self.search_bar.text(): self.filter_list()
+        self.sync_all_sel_state()
+        if errors: QMessageBox.warning(self, self.i18n.t("msg_rename_fail"), "\n".join(errors))
+
+    def rebuild_mod_rows(self, item):
+        # 子分类节点保持不动
+        cat = item.data(COL_CAT, ROLE_CAT)
+        stale = {key: row for key, row in self.mod_rows.items() if key[0] == cat}
+        stale_lbls = {row[1] for row in stale.values()}
+        for key in stale: del self.mod_rows[key]
+        for tid in [tid for tid, lbl in self.item_map.items() if lbl in stale_lbls]: del self.item_map[tid]
+        blocked = self.tree.blockSignals(True)
+        for i in reversed(range(item.childCount())):
+            if not is_cat_item(item.child(i)): item.takeChild(i)
+        self.add_mod_items(item, cat, sorted(self.current_cats.get(cat, [])))
+        self.tree.blockSignals(blocked)
+
     def batch_move_mods(self): 
         if not self.selected_mods: return
         cats = list(self.current_cats.keys()) 
@@ -695,40 +1613,56 @@ class ModManager3(QMainWindow):
             for src_cat, pak in list(self.selected_mods): 
                 if src_cat != dest_cat:
                     try:
-                        old_p = os.path.join(self.repo_path, "" if src_cat == uncat_key else src_cat, pak) 
+                        old_p = self.mod_path(src_cat, pak)
+                        old_img = os.path.join(os.path.dirname(old_p), pak.replace(".pak", ".png"))
                         new_dir = os.path.join(self.repo_path, "" if dest_cat == uncat_key else dest_cat) 
                         if not os.path.exists(new_dir): os.makedirs(new_dir) 
-                        os.rename(old_p, os.path.join(new_dir, pak)) 
-                        if os.path.exists(old_p.replace(".pak", ".png")):
-                            os.rename(old_p.replace(".pak", ".png"), os.path.join(new_dir, pak.replace(".pak", ".png"))) 
+                        os.rename(old_p, os.path.join(new_dir, os.path.basename(old_p))) 
+                        if os.path.exists(old_img):
+                            os.rename(old_img, os.path.join(new_dir, pak.replace(".pak", ".png"))) 
                     except: pass
             self.selected_mods.clear()
             self.refresh_data()
 
     def batch_delete_logic(self): 
-        if not self.selected_mods and self.tree.topLevelItemCount() == 0: return
+        if not self.selected_mods and not self.selection.folders: return
         selected_folders, uncat_key = [], self.i18n.t("cat_uncategorized")
-        for i in range(self.tree.topLevelItemCount()):
-            p_item = self.tree.topLevelItem(i)
-            p_cb_w = self.tree.itemWidget(p_item, COL_CHECK)
-            if p_cb_w and p_cb_w.findChild(QCheckBox).isChecked():
-                folder_name = p_item.text(COL_CAT).replace("📂 ", "").strip()
-                if folder_name != uncat_key: selected_folders.append(folder_name)
+        in_folders = lambda cat: any(cat == f or cat.startswith(f + "/") for f in selected_folders)
+        # 父目录已整体删除时不再单独处理子目录（排序后父目录总在子目录前面）
+        for folder_name in sorted(self.selection.folders):
+            if folder_name != uncat_key and not in_folders(folder_name): selected_folders.append(folder_name)
         if not self.selected_mods and not selected_folders: return
         if QMessageBox.question(self, "", self.i18n.t("confirm_delete")) != QMessageBox.StandardButton.Yes: return 
-        for f in selected_folders:
-            try: shutil.rmtree(os.path.join(self.repo_path, f))
-            except: pass
+        rel_paths = list(selected_folders)
         for cat, pak in list(self.selected_mods): 
-            if cat in selected_folders: continue 
-            target_path = os.path.join(self.repo_path, "" if cat == uncat_key else cat, pak) 
-            try: 
-                if os.path.exists(target_path): os.remove(target_path) 
-                if os.path.exists(target_path.replace(".pak", ".png")): os.remove(target_path.replace(".pak", ".png"))
-                self.known_mods.discard(pak)
-            except: pass 
+            if in_folders(cat): continue 
+            rel_dir = "" if cat == uncat_key else cat
+            rel_paths += [os.path.join(rel_dir, self.stored_name(cat, pak)), os.path.join(rel_dir, pak.replace(".pak", ".png"))]
+            self.known_mods.discard(pak)
+        try: TrashBin(self.repo_path).move_in(rel_paths)
+        except Exception as e: QMessageBox.warning(self, self.i18n.t("msg_op_fail"), str(e))
         self.selected_mods.clear()
         self.refresh_data()
+        self.schedule_trash_purge()
+
+    def undo_delete(self):
+        if not self.repo_path: return
+        trash = TrashBin(self.repo_path)
+        batches = trash.batches()
+        if not batches: return
+        try: left = trash.restore(batches[-1])
+        except Exception as e:
+            QMessageBox.warning(self, self.i18n.t("msg_op_fail"), str(e))
+            left = []
+        self.refresh_data()
+        if left: QMessageBox.warning(self, self.i18n.t("msg_op_fail"), self.i18n.t("msg_undo_conflict", "\n".join(left)))
+
+    def update_undo_btn(self):
+        self.btn_undo_del.setEnabled(bool(self.repo_path) and bool(TrashBin(self.repo_path).batches()))
+
+    def schedule_trash_purge(self):
+        if self.repo_path and os.path.isdir(os.path.join(self.repo_path, TRASH_DIR)):
+            self.thread_pool.start(TrashPurgeWorker(TrashBin(self.repo_path), self.trash_purge_signals.finished))
 
     def create_folder(self):
         if not self.repo_path: return
@@ -745,17 +1679,71 @@ class ModManager3(QMainWindow):
 
     def exec_batch(self, en):
         if not self.selected_mods: return
+        target_dirs = [self.game_path]
+        if len(self.targets) > 1:
+            dlg = TargetPickerDialog(self.targets, self.active_target, self.i18n, self)
+            if dlg.exec() != QDialog.DialogCode.Accepted: return
+            target_dirs = dlg.chosen_paths()
+            if not target_dirs: return
         uncat_key = self.i18n.t("cat_uncategorized")
+        jobs = []
         for cat, pak in list(self.selected_mods):
-            src = os.path.join(self.repo_path, "" if cat == uncat_key else cat, pak)
+            src = self.mod_path(cat, pak)
             if os.path.exists(src):
-                target = os.path.join(self.game_path, pak)
+                targets = [os.path.join(d, pak) for d in target_dirs]
                 try:
-                    if en: shutil.copy2(src, target)
-                    elif os.path.exists(target): os.remove(target)
+                    if en: jobs.append((src, targets))
+                    else:
+                        for target in targets:
+                            if os.path.exists(target): os.remove(target)
                     self.known_mods.add(pak)
                 except: pass
-        self.refresh_data()
+        if jobs: self.run_copy_jobs(jobs, self.refresh_data)
+        else: self.refresh_data()
+
+    def run_copy_jobs(self, jobs, on_done):
+        dlg = QProgressDialog(self.i18n.t("msg_copying"), self.i18n.t("btn_cancel"), 0, 1000, self)
+        dlg.setWindowModality(Qt.WindowModality.WindowModal)
+        dlg.setMinimumDuration(0)
+        signals = CopySignals()
+        worker = CopyWorker(jobs, signals, self.verify_copies)
+        signals.progress.connect(lambda d, t: dlg.setValue(int(d * 1000 / t) if t else 1000))
+        dlg.canceled.connect(worker.cancel_event.set)
+        def finished(errors, cancelled):
+            self.copy_signals.discard(signals)
+            dlg.close()
+            if errors: QMessageBox.warning(self, self.i18n.t("msg_op_fail"), "\n".join(errors))
+            on_done()
+        signals.finished.connect(finished)
+        self.copy_signals.add(signals)
+        self.thread_pool.start(worker)
+
+    def compress_idle_mods(self):
+        # 所有部署目标里都没有启用的模组才压缩
+        if not self.repo_path: return
+        deployed = set()
+        for target_path in self.targets.values():
+            if target_path and os.path.isdir(target_path): deployed.update(os.listdir(target_path))
+        paths = [self.mod_path(cat, pak) for cat, pak in sorted(self.all_mods_in_repo)
+                 if pak not in deployed and self.stored_name(cat, pak) == pak]
+        if not paths: return
+        dlg = QProgressDialog(self.i18n.t("msg_compressing"), self.i18n.t("btn_cancel"), 0, 1000, self)
+        dlg.setWindowModality(Qt.WindowModality.WindowModal)
+        dlg.setMinimumDuration(0)
+        signals = CompressSignals()
+        worker = CompressWorker(paths, signals)
+        signals.progress.connect(lambda d, t: dlg.setValue(int(d * 1000 / t) if t else 1000))
+        dlg.canceled.connect(worker.cancel_event.set)
+        def finished(saved, packed, kept, errors, cancelled):
+            self.copy_signals.discard(signals)
+            dlg.close()
+            self.refresh_data()
+            text = self.i18n.t("msg_compress_summary", packed, format_size(saved), kept)
+            if errors: text += "\n\n" + "\n".join(errors)
+            QMessageBox.information(self, self.i18n.t("btn_compress_idle"), text)
+        signals.finished.connect(finished)
+        self.copy_signals.add(signals)
+        self.thread_pool.start(worker)
 
     def show_large_preview(self, pak, pos):
         rn = pak.replace(".pak", "")
@@ -774,44 +1762,114 @@ class ModManager3(QMainWindow):
             self.item_map[tid].setPixmap(pix)
             self.item_map[tid].setText("")
             self.qimage_cache[n] = full
+        if self.startup_thumbs is not None:
+            self.startup_thumbs.discard(tid)
+            if not self.startup_thumbs: self.finish_startup_timing()
 
     def handle_img_drop(self, pak, rel, src):
-        try:
-            with Image.open(src) as img: img.convert("RGB").save(os.path.join(self.repo_path, rel, pak.replace(".pak", ".png")), "PNG")
+        self.start_preview_import([(src, (rel if rel else self.i18n.t("cat_uncategorized"), pak))])
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls(): event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        paths = [u.toLocalFile() for u in event.mimeData().urls() if u.isLocalFile()]
+        if paths: self.bulk_assign_previews(paths)
+
+    def bulk_assign_previews(self, paths):
+        # 同名的多份 pak 都会设置
+        if not self.repo_path: return
+        images = []
+        for p in paths:
+            if os.path.isdir(p):
+                for root, _, files in os.walk(p):
+                    images += [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTS)]
+            elif p.lower().endswith(IMAGE_EXTS): images.append(p)
+        index = {}
+        for cat, pak in self.all_mods_in_repo: index.setdefault(normalize_mod_name(pak), []).append((cat, pak))
+        jobs, unmatched, taken = [], [], set()
+        for src in images:
+            n = normalize_mod_name(src)
+            if n not in index or n in taken:
+                unmatched.append(os.path.basename(src))
+                continue
+            taken.add(n)
+            jobs += [(src, key) for key in index[n]]
+        self.start_preview_import(jobs, unmatched)
+
+    def start_preview_import(self, jobs, unmatched=None):
+        uncat_key = self.i18n.t("cat_uncategorized")
+        full_jobs = [(src, os.path.join(self.repo_path, "" if cat == uncat_key else cat, pak.replace(".pak", ".png")), (cat, pak))
+                     for src, (cat, pak) in jobs]
+        signals = PreviewImportSignals()
+        signals.finished.connect(lambda done, errors: self.on_previews_imported(signals, done, errors, unmatched))
+        self.preview_signals.add(signals)
+        self.thread_pool.start(PreviewImportWorker(full_jobs, signals.finished))
+
+    def on_previews_imported(self, signals, done, errors, unmatched):
+        self.preview_signals.discard(signals)
+        uncat_key = self.i18n.t("cat_uncategorized")
+        # 只更新受影响的行，不重建整棵树
+        for cat, pak in done:
             self.known_mods.add(pak)
-            QTimer.singleShot(100, self.refresh_data)
-        except: pass
+            self.cat_images.setdefault(cat, set()).add(pak.replace(".pak", ".png"))
+            self.qimage_cache.pop(pak.replace(".pak", ""), None)
+            if (cat, pak) in self.mod_rows:
+                item, lbl, _ = self.mod_rows[(cat, pak)]
+                self.apply_name_color(item, pak)
+                self.load_preview(lbl, "" if cat == uncat_key else cat, pak)
+        if unmatched is None:
+            if errors: QMessageBox.warning(self, self.i18n.t("msg_op_fail"), "\n".join(errors))
+            return
+        missing = sorted(pak for cat, pak in self.all_mods_in_repo if pak.replace(".pak", ".png") not in self.cat_images.get(cat, ()))
+        short = lambda names: "\n".join(names[:SUMMARY_LIST_LIMIT]) + ("\n..." if len(names) > SUMMARY_LIST_LIMIT else "")
+        text = self.i18n.t("msg_preview_summary", len(done), len(unmatched), short(unmatched), len(missing), short(missing))
+        if errors: text += "\n\n" + short(errors)
+        QMessageBox.information(self, self.i18n.t("msg_preview_import"), text)
 
     def filter_list(self):
         t = self.search_bar.text().lower()
-        for i in range(self.tree.topLevelItemCount()):
-            p = self.tree.topLevelItem(i)
-            v = 0
-            for j in range(p.childCount()):
-                match = t in p.child(j).text(COL_NAME).lower()
-                p.child(j).setHidden(not match)
-                if match: v += 1
+        def count_matches(cat):
+            return sum(1 for _, pak in self.iter_cat_mods(cat) if t in pak.lower())
+        def walk(p):
+            # 未填充的分类按数据统计匹配数，已填充的逐行设置可见性
+            if not p.data(COL_CAT, ROLE_POPULATED): v = count_matches(p.data(COL_CAT, ROLE_CAT))
+            else:
+                v = 0
+                for j in range(p.childCount()):
+                    c = p.child(j)
+                    if is_cat_item(c): v += walk(c)
+                    else:
+                        match = t in c.text(COL_NAME).lower()
+                        c.setHidden(not match)
+                        if match: v += 1
             p.setHidden(v == 0 and t != "")
+            return v
+        for i in range(self.tree.topLevelItemCount()): walk(self.tree.topLevelItem(i))
+
+    def update_conflict_label(self):
+        self.pak_counts = self.get_pak_counts()
+        conflict_groups = sum(1 for pak_name in self.pak_counts if self.pak_counts[pak_name] > 1)
+        self.conflict_label.setText(self.i18n.t("conflict_warn", conflict_groups) if conflict_groups > 0 else "")
 
     def get_pak_counts(self):
         if not hasattr(self, 'current_cats'): return Counter()
         return Counter([pak for paks in self.current_cats.values() for pak in paks])
 
-    def toggle_mod(self, src, pak, is_en, btn_widget):
+    def set_action_btn_state(self, btn, is_en):
+        btn.setText(self.i18n.t("mod_enabled" if is_en else "mod_disabled"))
+        btn.setStyleSheet("background-color: #0078D4;" if is_en else "background-color: #3A3A3A; color: #AAA;")
+
+    def toggle_mod(self, src, pak, btn_widget):
         try:
             target = os.path.join(self.game_path, pak)
-            if is_en: 
-                if os.path.exists(target): os.remove(target)
-                new_en = False
-            else: 
-                shutil.copy2(src, target)
-                new_en = True
             self.known_mods.add(pak)
-            btn_widget.setText(self.i18n.t("mod_enabled" if new_en else "mod_disabled")) 
-            btn_widget.setStyleSheet("background-color: #0078D4;" if new_en else "background-color: #3A3A3A; color: #AAA;") 
-            try: btn_widget.clicked.disconnect()
-            except: pass
-            btn_widget.clicked.connect(lambda chk=False, s=src, p=pak, en=new_en, b=btn_widget: self.toggle_mod(s, p, en, b)) 
+            if not os.path.exists(target):
+                # 拷贝在后台进行，完成后统一刷新
+                self.run_copy_jobs([(src, [target])], self.refresh_data)
+                return
+            os.remove(target)
+            self.set_action_btn_state(btn_widget, False)
             self.refresh_data()
         except Exception as e: 
             QMessageBox.warning(self, self.i18n.t("msg_op_fail"), str(e))
@@ -827,21 +1885,91 @@ class ModManager3(QMainWindow):
         p = QFileDialog.getExistingDirectory(self, self.i18n.t("btn_set_game"))
         if p: 
             self.game_path = p
+            self.update_target_combo()
             self.save_cfg()
             self.refresh_data()
 
+    @property
+    def game_path(self):
+        return self.targets.get(self.active_target, "")
+
+    @game_path.setter
+    def game_path(self, path):
+        if not self.active_target: self.active_target = self.i18n.t("target_default")
+        self.targets[self.active_target] = path
+
+    def update_target_combo(self):
+        self.target_combo.blockSignals(True)
+        self.target_combo.clear()
+        self.target_combo.addItems(list(self.targets))
+        self.target_combo.setCurrentText(self.active_target)
+        self.target_combo.blockSignals(False)
+        self.remove_target_btn.setEnabled(len(self.targets) > 1)
+
+    def switch_target(self, name):
+        if name not in self.targets or name == self.active_target: return
+        self.active_target = name
+        self.save_cfg()
+        self.update_enabled_view()
+
+    def update_enabled_view(self):
+        # 不重新扫描模组库
+        self.update_path_labels()
+        if not self.mod_rows: 
+            self.refresh_data()
+            return
+        self.game_files = set(os.listdir(self.game_path)) if os.path.exists(self.game_path) else set()
+        for (cat, pak), (item, lbl, btn) in self.mod_rows.items(): self.set_action_btn_state(btn, pak in self.game_files)
+
+    def add_target(self):
+        name, ok = QInputDialog.getText(self, self.i18n.t("btn_add_target"), self.i18n.t("dialog_target_name"))
+        name = name.strip()
+        if not ok or not name: return
+        p = QFileDialog.getExistingDirectory(self, self.i18n.t("btn_set_game"))
+        if not p: return
+        self.targets[name] = p
+        self.active_target = name
+        self.update_target_combo()
+        self.save_cfg()
+        self.update_enabled_view()
+
+    def remove_target(self):
+        if len(self.targets) <= 1: return
+        self.targets.pop(self.active_target, None)
+        self.active_target = next(iter(self.targets))
+        self.update_target_combo()
+        self.save_cfg()
+        self.update_enabled_view()
+
     def load_config(self):
         if os.path.exists(CONFIG_FILE):
             try:
                 with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
                     d = json.load(f)
-                    self.repo_path, self.game_path = d.get("repo", ""), d.get("game", "")
                     self.i18n.load_language(d.get("lang", "zh_CN"))
+                    self.repo_path = d.get("repo", "")
+                    self.targets = d.get("targets") or ({self.i18n.t("target_default"): d["game"]} if d.get("game") else {})
+                    self.active_target = d.get("active_target", "")
+                    if self.active_target not in self.targets: self.active_target = next(iter(self.targets), "")
+                    self.verify_copies = d.get("verify_copies", False)
+                    self.scan_depth = d.get("scan_depth", SCAN_MAX_DEPTH)
+                    self.scan_ignore = d.get("scan_ignore", list(SCAN_IGNORE))
+                    self.expanded_map = {rel or self.i18n.t("cat_uncategorized"): True for rel in d.get("expanded", [])}
             except: pass
 
     def save_cfg(self):
+        uncat_key = self.i18n.t("cat_uncategorized")
+        expanded = sorted("" if cat == uncat_key else cat for cat, on in self.snapshot_expanded().items() if on)
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f: 
-            json.dump({"repo": self.repo_path, "game": self.game_path, "lang": self.i18n.current_lang}, f)
+            json.dump({"repo": self.repo_path, "game": self.game_path, "lang": self.i18n.current_lang,
+                       "targets": self.targets, "active_target": self.active_target,
+                       "verify_copies": self.verify_copies, "scan_depth": self.scan_depth,
+                       "scan_ignore": self.scan_ignore, "expanded": expanded}, f, ensure_ascii=False)
+
+    def closeEvent(self, event):
+        # 保存展开状态，下次启动只填充用户展开过的分类
+        if self.repo_path: self.save_cfg()
+        super().closeEvent(event)
 
     def showEvent(self, event): 
         super().showEvent(event)
@@ -869,8 +1997,14 @@ class ModManager3(QMainWindow):
             header.setUpdatesEnabled(True)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    startup_timer = StartupTimer("--startup-timing" in sys.argv)
+    if startup_timer.enabled: sys.argv.remove("--startup-timing")
+    startup_timer.mark("imports")
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     app = QApplication(sys.argv)
-    win = ModManager3()
+    startup_timer.mark("qapplication")
+    win = ModManager3(startup_timer)
     win.show()
+    startup_timer.mark("show")
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,79 @@
+import os
+import lzma
+import hashlib
+import logging
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+import modmanager2
+from modmanager2 import CopyCancelled, copy_file_fast, copy_file_multi
+
+@pytest.fixture
+def src(tmp_path, monkeypatch):
+    # 小块让测试也能走多块和中途取消的路径
+    monkeypatch.setattr(modmanager2, "COPY_CHUNK", 4096)
+    path = tmp_path / "src.pak"
+    path.write_bytes(os.urandom(4096 * 5 + 123))
+    return path
+
+def copy_method(caplog):
+    return caplog.records[-1].args[-1]
+
+@pytest.mark.skipif(not (hasattr(os, "copy_file_range") or hasattr(os, "sendfile")), reason="no kernel copy")
+def test_kernel_path(src, tmp_path, caplog):
+    caplog.set_level(logging.INFO, logger="modmanager")
+    dst = tmp_path / "dst.pak"
+    seen = []
+    assert copy_file_fast(str(src), str(dst), progress=lambda d, t: seen.append((d, t))) is None
+    assert dst.read_bytes() == src.read_bytes()
+    assert copy_method(caplog) in ("copy_file_range", "sendfile")
+    assert seen[-1] == (src.stat().st_size, src.stat().st_size)
+    assert not os.path.exists(str(dst) + ".part")
+
+def test_chunked_fallback(src, tmp_path, caplog, monkeypatch):
+    caplog.set_level(logging.INFO, logger="modmanager")
+    def unsupported(*a): raise OSError("unsupported")
+    monkeypatch.setattr(modmanager2, "_copy_file_range_step", unsupported)
+    monkeypatch.setattr(modmanager2, "_sendfile_step", unsupported)
+    dst = tmp_path / "dst.pak"
+    copy_file_fast(str(src), str(dst))
+    assert dst.read_bytes() == src.read_bytes()
+    assert copy_method(caplog) == "chunked"
+
+def test_verify_returns_digest(src, tmp_path):
+    dst = tmp_path / "dst.pak"
+    digest = copy_file_fast(str(src), str(dst), verify=True)
+    assert digest == hashlib.sha256(src.read_bytes()).hexdigest()
+    assert dst.read_bytes() == src.read_bytes()
+
+def test_cancel_removes_part_and_keeps_old_file(src, tmp_path):
+    dst = tmp_path / "dst.pak"
+    dst.write_bytes(b"old")
+    calls = []
+    with pytest.raises(CopyCancelled):
+        copy_file_fast(str(src), str(dst), cancel=lambda: calls.append(1) or len(calls) > 2)
+    assert dst.read_bytes() == b"old"
+    assert not os.path.exists(str(dst) + ".part")
+
+def test_multi_fan_out_with_verify(src, tmp_path):
+    dsts = [tmp_path / "a" / "x.pak", tmp_path / "b" / "x.pak"]
+    for d in dsts: d.parent.mkdir()
+    digest = copy_file_multi(str(src), [str(d) for d in dsts], verify=True)
+    assert digest == hashlib.sha256(src.read_bytes()).hexdigest()
+    assert all(d.read_bytes() == src.read_bytes() for d in dsts)
+
+def test_multi_decompresses(src, tmp_path):
+    packed = tmp_path / "src.pak.xz"
+    packed.write_bytes(lzma.compress(src.read_bytes()))
+    dst = tmp_path / "dst.pak"
+    copy_file_fast(str(packed), str(dst))
+    assert dst.read_bytes() == src.read_bytes()
+
+def test_multi_cancel_removes_all_parts(src, tmp_path):
+    dsts = [str(tmp_path / "a.pak"), str(tmp_path / "b.pak")]
+    calls = []
+    with pytest.raises(CopyCancelled):
+        copy_file_multi(str(src), dsts, cancel=lambda: calls.append(1) or len(calls) > 2)
+    assert os.listdir(tmp_path) == ["src.pak"]
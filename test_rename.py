@@ -0,0 +1,79 @@
+import os
+import re
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from modmanager2 import ModManager3, plan_renames
+
+def test_plan_simple_and_regex():
+    cats = {"A": ["foo_1.pak", "foo_2.pak"]}
+    assert plan_renames([("A", "foo_1.pak")], cats, "foo", "bar") == [("A", "foo_1.pak", "bar_1.pak", "ok")]
+    assert plan_renames([("A", "foo_2.pak")], cats, r"foo_(\d)", r"\1_foo", use_regex=True) == \
+        [("A", "foo_2.pak", "2_foo.pak", "ok")]
+
+def test_plan_collision_within_batch():
+    cats = {"A": ["x1.pak", "x2.pak"]}
+    plan = plan_renames([("A", "x1.pak"), ("A", "x2.pak")], cats, r"\d", "", use_regex=True)
+    assert [st for *_, st in plan] == ["collision", "collision"]
+
+def test_plan_collision_with_existing_case_insensitive():
+    cats = {"A": ["old.pak", "Taken.pak"], "B": ["new.pak"]}
+    assert plan_renames([("A", "old.pak")], cats, "old", "taken")[0][3] == "collision"
+    # 其他分类里的同名模组不算冲突
+    assert plan_renames([("A", "old.pak")], cats, "old", "new")[0][3] == "ok"
+    # 只改大小写不算与自身冲突
+    assert plan_renames([("A", "old.pak")], cats, "old", "Old")[0][3] == "ok"
+
+def test_plan_invalid_names():
+    cats = {"A": ["a.pak"]}
+    assert plan_renames([("A", "a.pak")], cats, "a", "")[0][3] == "invalid"
+    assert plan_renames([("A", "a.pak")], cats, "a", "b/c")[0][3] == "invalid"
+
+def test_plan_regex_error():
+    with pytest.raises(re.error):
+        plan_renames([("A", "a.pak")], {"A": ["a.pak"]}, "(", "", use_regex=True)
+
+def test_plan_keeps_extension_case():
+    cats = {"A": ["Foo.PAK", "foo_x.pak"]}
+    assert plan_renames([("A", "Foo.PAK"), ("A", "foo_x.pak")], cats, "_x", "_y") == \
+        [("A", "Foo.PAK", "Foo.PAK", "unchanged"), ("A", "foo_x.pak", "foo_y.pak", "ok")]
+    assert plan_renames([("A", "Foo.PAK")], cats, "Foo", "Bar")[0][2:] == ("Bar.PAK", "ok")
+
+def make_mgr(repo, target):
+    return SimpleNamespace(repo_path=repo, targets={"Default": target},
+                           i18n=SimpleNamespace(t=lambda key: "Uncategorized"),
+                           stored_name=lambda cat, pak: pak)
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+def test_rename_moves_pak_preview_and_deployed_copy(tmp_path):
+    repo, game = str(tmp_path / "repo"), str(tmp_path / "game")
+    for p in (os.path.join(repo, "A", "d.PAK"), os.path.join(repo, "A", "d.png"), os.path.join(game, "d.PAK")): touch(p)
+    ModManager3.rename_mod_files(make_mgr(repo, game), "A", "d.PAK", "e.PAK")
+    assert sorted(os.listdir(os.path.join(repo, "A"))) == ["e.PAK", "e.png"]
+    assert os.listdir(game) == ["e.PAK"]
+
+def test_rename_rolls_back_on_failure(tmp_path, monkeypatch):
+    repo, game = str(tmp_path / "repo"), str(tmp_path / "game")
+    for p in (os.path.join(repo, "A", "d.pak"), os.path.join(repo, "A", "d.png"), os.path.join(game, "d.pak")): touch(p)
+    real_rename = os.rename
+    def failing_rename(src, dst):
+        if os.path.dirname(dst) == game and os.path.basename(dst) == "e.pak": raise PermissionError(dst)
+        real_rename(src, dst)
+    monkeypatch.setattr(os, "rename", failing_rename)
+    with pytest.raises(PermissionError):
+        ModManager3.rename_mod_files(make_mgr(repo, game), "A", "d.pak", "e.pak")
+    assert sorted(os.listdir(os.path.join(repo, "A"))) == ["d.pak", "d.png"]
+    assert os.listdir(game) == ["d.pak"]
+
+def test_rename_refuses_existing_target(tmp_path):
+    repo, game = str(tmp_path / "repo"), str(tmp_path / "game")
+    for p in (os.path.join(repo, "A", "d.pak"), os.path.join(game, "d.pak"), os.path.join(game, "e.pak")): touch(p)
+    with pytest.raises(FileExistsError):
+        ModManager3.rename_mod_files(make_mgr(repo, game), "A", "d.pak", "e.pak")
+    assert os.listdir(os.path.join(repo, "A")) == ["d.pak"]
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from modmanager2 import TrashBin, TRASH_DIR
+
+def make_file(repo, rel, size=100):
+    path = os.path.join(repo, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f: f.write(b"x" * size)
+    return path
+
+def age_batch(trash, batch, ts_ms):
+    # 批次名以毫秒时间戳开头，改名即可模拟旧批次
+    old = f"{ts_ms}_{batch.split('_', 1)[1]}"
+    os.rename(os.path.join(trash.root, batch), os.path.join(trash.root, old))
+    return old
+
+def test_move_in_and_restore(tmp_path):
+    repo = str(tmp_path)
+    make_file(repo, "A/a.pak")
+    make_file(repo, "b.pak")
+    trash = TrashBin(repo)
+    batch = trash.move_in(["A/a.pak", "b.pak", "missing.pak"])
+    assert not os.path.exists(os.path.join(repo, "A", "a.pak"))
+    assert trash.batches() == [batch]
+    assert trash.restore(batch) == []
+    assert os.path.isfile(os.path.join(repo, "A", "a.pak")) and os.path.isfile(os.path.join(repo, "b.pak"))
+    assert trash.batches() == []
+
+def test_restore_conflict_keeps_batch(tmp_path):
+    repo = str(tmp_path)
+    make_file(repo, "A/a.pak", size=10)
+    make_file(repo, "b.pak")
+    trash = TrashBin(repo)
+    batch = trash.move_in(["A/a.pak", "b.pak"])
+    make_file(repo, "A/a.pak", size=3)
+    assert trash.restore(batch) == ["A/a.pak"]
+    # 占用原路径的新文件不被覆盖，未还原的条目留在批次里
+    assert os.path.getsize(os.path.join(repo, "A", "a.pak")) == 3
+    assert os.path.isfile(os.path.join(repo, "b.pak"))
+    assert trash.batches() == [batch]
+    os.remove(os.path.join(repo, "A", "a.pak"))
+    assert trash.restore(batch) == []
+    assert os.path.getsize(os.path.join(repo, "A", "a.pak")) == 10
+    assert trash.batches() == []
+
+def test_purge_by_age(tmp_path):
+    repo = str(tmp_path)
+    make_file(repo, "old.pak")
+    make_file(repo, "new.pak")
+    trash = TrashBin(repo)
+    old = age_batch(trash, trash.move_in(["old.pak"]), 1000)
+    new = trash.move_in(["new.pak"])
+    trash.purge(max_age=3600)
+    assert trash.batches() == [new]
+    assert not os.path.exists(os.path.join(trash.root, old))
+    assert not any(n.endswith(".purging") for n in os.listdir(trash.root))
+
+def test_purge_by_size_keeps_newest(tmp_path):
+    repo = str(tmp_path)
+    trash = TrashBin(repo)
+    make_file(repo, "big.pak", size=1000)
+    only = trash.move_in(["big.pak"])
+    trash.purge(max_bytes=5)
+    assert trash.batches() == [only]
+    make_file(repo, "a.pak")
+    make_file(repo, "b.pak")
+    older = age_batch(trash, only, 1000 * (int(only.split("_")[0]) // 1000 - 2))
+    mid = trash.move_in(["a.pak"])
+    newest = trash.move_in(["b.pak"])
+    assert trash.batches()[0] == older
+    trash.purge(max_bytes=150)
+    assert trash.batches() == [newest]
+    assert mid not in trash.batches()
+
+def test_purging_batches_hidden(tmp_path):
+    repo = str(tmp_path)
+    make_file(repo, "a.pak")
+    trash = TrashBin(repo)
+    batch = trash.move_in(["a.pak"])
+    os.rename(os.path.join(trash.root, batch), os.path.join(trash.root, batch + ".purging"))
+    assert trash.batches() == []
+    assert os.path.isdir(os.path.join(repo, TRASH_DIR, batch + ".purging"))
@@ -0,0 +1,41 @@
+"""ModManager3 离屏界面性能回归检查，耗时较长，只在 UI_BENCH=1 时运行（python ui_bench.py 会自动设置）。
+基线是机器相关的，先在本机用 python ui_bench.py --save-baseline 生成，不纳入版本库。
+
+环境变量：UI_BENCH_SIZES（空格分隔的规模）、UI_BENCH_REPEAT、UI_BENCH_TOLERANCE、UI_BENCH_BASELINE、UI_BENCH_RESULTS。
+"""
+import os
+import json
+
+import pytest
+
+if os.environ.get("UI_BENCH") != "1": pytest.skip("UI benchmark is opt-in; set UI_BENCH=1", allow_module_level=True)
+pytest.importorskip("PyQt6")
+pytest.importorskip("PIL")
+
+import ui_bench
+
+SIZES = [int(n) for n in os.environ.get("UI_BENCH_SIZES", "").split()] or ui_bench.DEFAULT_SIZES
+REPEAT = int(os.environ.get("UI_BENCH_REPEAT", ui_bench.DEFAULT_REPEAT))
+TOLERANCE = float(os.environ.get("UI_BENCH_TOLERANCE", "1.5"))
+BASELINE = os.environ.get("UI_BENCH_BASELINE", ui_bench.BASELINE_FILE)
+RESULTS = os.environ.get("UI_BENCH_RESULTS", ui_bench.RESULTS_FILE)
+
+@pytest.fixture(scope="module")
+def recorder():
+    results = []
+    yield results
+    if results: ui_bench.record(sorted(results, key=lambda r: r["mods"]), RESULTS)
+
+@pytest.fixture(scope="module")
+def baseline():
+    if not os.path.exists(BASELINE): pytest.skip(f"no baseline at {BASELINE}; run: python ui_bench.py --save-baseline")
+    with open(BASELINE, 'r', encoding='utf-8') as f: return json.load(f)
+
+@pytest.mark.parametrize("n_mods", SIZES)
+def test_ui_latency(n_mods, recorder, baseline):
+    res = ui_bench.measure(n_mods, REPEAT)
+    recorder.append(res)
+    print(" ", "  ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in res.items()))
+    assert res["thumbs_loaded_ms"] is not None, "visible thumbnails did not finish loading"
+    regressions = ui_bench.compare([res], baseline, TOLERANCE)
+    assert not regressions, "\n".join(regressions)
@@ -0,0 +1,182 @@
+"""离屏界面性能基准：在 QT_QPA_PLATFORM=offscreen 下用不同规模的生成库启动 ModManager3，
+测量首帧绘制、可见缩略图全部加载、单次切换后的 refresh_data、一次缩放以及峰值内存。
+检查由 test_ui_bench.py（pytest）完成，这里提供测量函数和命令行包装：
+
+    python ui_bench.py                          # 运行 pytest 检查，结果追加到 ui_bench_results.json
+    python ui_bench.py --sizes 100 1000 --tolerance 2
+    python ui_bench.py --save-baseline          # 只测量并把本次结果存为本机基线 ui_bench_baseline.json（不提交）
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import shutil
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [100, 1000, 3000]
+RESULTS_FILE = os.path.join(HERE, "ui_bench_results.json")
+BASELINE_FILE = os.path.join(HERE, "ui_bench_baseline.json")
+THUMB_TIMEOUT_S = 120
+# 每个规模测量的次数，各指标取最小值以压低偶发抖动
+DEFAULT_REPEAT = 3
+# 绝对误差下限，避免毫秒级指标的抖动被判为退化
+NOISE_FLOOR = {"first_paint_ms": 30, "thumbs_loaded_ms": 100, "refresh_after_toggle_ms": 20,
+               "zoom_step_ms": 20, "peak_rss_mb": 20}
+
+def make_library(base, n_mods, n_cats=20, enabled_ratio=0.1):
+    from PIL import Image
+    repo, game = os.path.join(base, "repo"), os.path.join(base, "game")
+    os.makedirs(game)
+    rnd = random.Random(n_mods)
+    for i in range(n_mods):
+        cat = "" if i % (n_cats + 1) == 0 else f"Category {i % (n_cats + 1):02d}"
+        d = os.path.join(repo, cat)
+        os.makedirs(d, exist_ok=True)
+        name = f"mod_{i:05d}"
+        with open(os.path.join(d, name + ".pak"), 'wb') as f: f.write(rnd.randbytes(4096))
+        Image.new("RGB", (256, 256), (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256))).save(os.path.join(d, name + ".png"))
+        if rnd.random() < enabled_ratio:
+            with open(os.path.join(game, name + ".pak"), 'wb') as f: f.write(b"x")
+    # 所有分类都按已展开的视图启动，测量的是整棵树都要填充的最坏情况
+    expanded = [""] + [f"Category {c:02d}" for c in range(1, n_cats + 1)]
+    with open(os.path.join(base, "settings_v3.json"), 'w', encoding='utf-8') as f:
+        json.dump({"repo": repo, "game": game, "lang": "en", "expanded": expanded}, f)
+    return repo, game
+
+def peak_rss_mb():
+    try: import resource
+    except ImportError: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+def run_one(n_mods):
+    # 由 measure 为每个规模单独启动子进程调用
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    base = tempfile.mkdtemp(prefix="smm_bench_")
+    repo, game = make_library(base, n_mods)
+    os.chdir(base)
+    sys.path.insert(0, HERE)
+    import modmanager2
+    from PyQt6.QtCore import QObject, QEvent
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication([])
+
+    class PaintWatcher(QObject):
+        first_paint = None
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and self.first_paint is None: self.first_paint = time.perf_counter()
+            return False
+
+    # 缩略图任务在首帧之后的 deferred_startup 里提交，先挂钩才不会漏掉先完成的信号
+    loaded, on_img_loaded = set(), modmanager2.ModManager3.on_img_loaded
+    def hooked(self, n, thumb, full, tid, msg):
+        loaded.add(tid)
+        on_img_loaded(self, n, thumb, full, tid, msg)
+    modmanager2.ModManager3.on_img_loaded = hooked
+    def wait_for(cond, timeout):
+        end = time.perf_counter() + timeout
+        while not cond() and time.perf_counter() < end:
+            app.processEvents()
+            time.sleep(0.001)
+        return cond()
+
+    t0 = time.perf_counter()
+    win = modmanager2.ModManager3()
+    watcher = PaintWatcher()
+    win.tree.viewport().installEventFilter(watcher)
+    win.show()
+    wait_for(lambda: watcher.first_paint is not None, 30)
+    res = {"mods": n_mods, "first_paint_ms": ((watcher.first_paint or time.perf_counter()) - t0) * 1000}
+    wait_for(lambda: win.item_map, 30)
+    visible = visible_thumb_ids(win)
+    ok = visible and wait_for(lambda: visible <= loaded, THUMB_TIMEOUT_S)
+    res["thumbs_loaded_ms"] = (time.perf_counter() - t0) * 1000 if ok else None
+
+    enabled = sorted(os.listdir(game))
+    if enabled: os.remove(os.path.join(game, enabled[0]))
+    t = time.perf_counter()
+    win.refresh_data()
+    app.processEvents()
+    res["refresh_after_toggle_ms"] = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    win.change_zoom(0.1)
+    app.processEvents()
+    res["zoom_step_ms"] = (time.perf_counter() - t) * 1000
+    res["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(res))
+    # 刷新和缩放提交的缩略图任务可能还在跑，退出前等它们结束，否则会在解释器销毁时崩溃
+    win.thread_pool.clear()
+    win.thread_pool.waitForDone()
+    os.chdir(HERE)
+    shutil.rmtree(base, ignore_errors=True)
+
+def visible_thumb_ids(win):
+    view = win.tree.viewport().rect()
+    visible_lbls = {lbl for item, lbl, btn in win.mod_rows.values() if win.tree.visualItemRect(item).intersects(view)}
+    return {tid for tid, lbl in win.item_map.items() if lbl in visible_lbls}
+
+def measure(n_mods, repeat=DEFAULT_REPEAT):
+    # 独立子进程保证峰值内存互不影响；多次测量时各指标取最小值
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", str(n_mods)],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    best = lambda vals: min(vals) if None not in vals else None
+    return {k: best([r[k] for r in runs]) for k in runs[0]}
+
+def record(results, path=RESULTS_FILE):
+    import modmanager2
+    entry = {"version": modmanager2.VERSION, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}
+    history = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f: history = json.load(f)
+    history.append(entry)
+    with open(path, 'w', encoding='utf-8') as f: json.dump(history, f, indent=2)
+    return entry
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    base_by_size = {r["mods"]: r for r in baseline.get("results", [])}
+    for r in results:
+        b = base_by_size.get(r["mods"])
+        if not b: continue
+        for key, floor in NOISE_FLOOR.items():
+            if r.get(key) is None or b.get(key) is None: continue
+            if r[key] > b[key] * tolerance and r[key] - b[key] > floor:
+                regressions.append(f"{r['mods']} mods: {key} {b[key]:.1f} -> {r[key]:.1f}")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="Offscreen UI latency benchmark for ModManager3")
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--results", default=RESULTS_FILE)
+    ap.add_argument("--baseline", default=BASELINE_FILE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=1.5)
+    ap.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    ap.add_argument("--run-one", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.run_one is not None: return run_one(args.run_one)
+
+    if args.save_baseline:
+        results = []
+        for n in args.sizes:
+            results.append(measure(n, args.repeat))
+            print("  ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in results[-1].items()))
+        with open(args.baseline, 'w', encoding='utf-8') as f: json.dump(record(results, args.results), f, indent=2)
+        return
+
+    import pytest
+    os.environ.update(UI_BENCH="1", UI_BENCH_SIZES=" ".join(map(str, args.sizes)), UI_BENCH_RESULTS=args.results,
+                      UI_BENCH_BASELINE=args.baseline, UI_BENCH_TOLERANCE=str(args.tolerance),
+                      UI_BENCH_REPEAT=str(args.repeat))
+    sys.exit(pytest.main(["-q", "-s", os.path.join(HERE, "test_ui_bench.py")]))
+
+if __name__ == "__main__":
+    main()